@@ -0,0 +1,171 @@
+"""
+字体生成性能测试
+
+在临时目录中生成不同数量、不同尺寸的字符图片，逐个规模运行 FontGenerator.generate_font，
+记录各阶段耗时（FontGenerator 的统计）、峰值内存、装箱效率和输出文件大小，结果保存为 JSON，便于发布前对比。
+
+    pdm run bench --sizes 10 100 1000 10000 -o bench.json
+    pdm run bench --sizes 10000 --max-page-size 8192 --band-height 256    # 分带合成的峰值内存
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from multiprocessing import get_context
+from pathlib import Path
+
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bmfont.service import FontGenerator  # noqa: E402
+
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+# 与其他字符图片完全相同的比例，用于测试去重
+DUPLICATE_RATIO = 0.05
+
+
+def make_glyph_set(folder: Path, count: int, seed: int = 0) -> list[dict]:
+    """
+    生成一组字符图片
+    Args:
+        folder: 保存目录
+        count: 字符数量
+        seed: 随机种子，相同的种子生成相同的图片
+
+    Returns:
+        字符数据列表
+    """
+    rng = random.Random(seed)
+    folder.mkdir(parents=True, exist_ok=True)
+    character_data: list[dict] = []
+    for index in range(count):
+        path = folder / f"glyph_{index}.png"
+        if character_data and rng.random() < DUPLICATE_RATIO:
+            # 复制已有的图片，内容相同但文件不同
+            path.write_bytes(Path(rng.choice(character_data)["image_path"]).read_bytes())
+        else:
+            # 大小混合：大部分是小字符，少量大字符
+            width = rng.choice([rng.randint(8, 32), rng.randint(24, 64), rng.randint(48, 128)])
+            height = rng.choice([rng.randint(16, 48), rng.randint(32, 96)])
+            image = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+            draw = ImageDraw.Draw(image)
+            color = (rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255), 255)
+            # 四周留出透明边距，裁剪时才有效果
+            margin_x, margin_y = rng.randint(0, width // 4), rng.randint(0, height // 4)
+            draw.ellipse((margin_x, margin_y, width - 1 - margin_x, height - 1 - margin_y), fill=color)
+            image.save(path)
+        character_data.append({"image_path": str(path), "value": chr(0x4E00 + index)})
+    return character_data
+
+
+def atlas_efficiency(descriptor_path: Path) -> float:
+    """
+    根据 JSON 描述文件计算装箱效率：字符占用的面积 / 所有大图的面积
+    """
+    data = json.loads(descriptor_path.read_text(encoding="utf8"))
+    common = data["common"]
+    # 相同图片的字符共用一块区域，只算一次
+    regions = {(c["page"], c["x"], c["y"], c["width"], c["height"]) for c in data["chars"]}
+    used = sum(width * height for _page, _x, _y, width, height in regions)
+    return used / (common["scaleW"] * common["scaleH"] * common["pages"])
+
+
+def run_case(character_data: list[dict], output_folder: str, options: dict) -> dict:
+    """
+    运行一次生成，在单独的进程中执行，峰值内存只包含这一次生成
+    """
+    generator = FontGenerator(
+        character_data=character_data,
+        output_folder=output_folder,
+        name="bench",
+        use_cache=False,
+        formats=("json",),
+        **options,
+    )
+    result = generator.generate_font()
+
+    output = Path(output_folder)
+    return {
+        "seconds": result.seconds,
+        "stages": {stage: asdict(stats) for stage, stats in result.stages.items()},
+        "peak_rss": result.peak_rss,
+        "efficiency": atlas_efficiency(output / "bench.json"),
+        "pages": result.pages,
+        "output_bytes": result.output_bytes,
+    }
+
+
+def run(sizes: list[int], options: dict, seed: int = 0) -> dict:
+    """
+    运行所有规模的测试
+    Args:
+        sizes: 字符数量列表
+        options: FontGenerator 的参数
+        seed: 随机种子
+
+    Returns:
+        测试结果
+    """
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bmfont-bench-") as temp:
+        temp_path = Path(temp)
+        for size in sizes:
+            character_data = make_glyph_set(temp_path / f"glyphs_{size}", size, seed)
+            output_folder = temp_path / f"out_{size}"
+            # 每个规模使用新的进程，峰值内存互不影响
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+                result = executor.submit(run_case, character_data, str(output_folder), options).result()
+            result["glyphs"] = size
+            results.append(result)
+            print(
+                f"{size:>6} 个字符：{result['seconds']:.3f}s，峰值内存 {result['peak_rss'] / 1024 / 1024:.1f} MB，"
+                f"装箱效率 {result['efficiency']:.2%}，输出 {result['output_bytes'] / 1024:.1f} KB",
+                file=sys.stderr,
+            )
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "options": options,
+        "seed": seed,
+        "results": results,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="字体生成性能测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="字符数量，默认 10 100 1000 10000")
+    parser.add_argument("--packer", default="maxrects", help="装箱算法")
+    parser.add_argument("--max-page-size", type=int, default=2048, help="每页大图的最大宽高，默认 2048")
+    parser.add_argument("--workers", type=int, default=0, help="加载字符图片的并发数，默认使用 CPU 核数")
+    parser.add_argument("--trim", action="store_true", help="裁掉字符图片四周的透明区域")
+    parser.add_argument("--dedupe", action="store_true", help="像素相同的字符共用大图中的同一块区域")
+    parser.add_argument("--band-height", type=int, default=0, help="分带合成的高度，默认 0 整页合成")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("-o", "--output", help="结果保存路径，默认输出到标准输出")
+    args = parser.parse_args(argv)
+
+    options = {
+        "packer": args.packer,
+        "max_page_size": args.max_page_size,
+        "workers": args.workers,
+        "trim": args.trim,
+        "dedupe": args.dedupe,
+        "band_height": args.band_height,
+    }
+    report = json.dumps(run(args.sizes, options, args.seed), ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(report, encoding="utf8")
+    else:
+        print(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""
+启动耗时测试
+
+每个场景在新的进程中运行多次，记录从启动进程到完成的时间：
+导入核心模块、命令行帮助、输入没有变化时的命令行构建（只检查缓存），以及图形界面导入完成和第一个窗口显示的时间。
+
+    pdm run startup --repeat 5 -o startup.json
+    pdm run startup --gui-command dist/PySideBMFont.exe    # 测试打包后的程序
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image
+
+ROOT = Path(__file__).resolve().parent.parent
+# 与 bmfont/ui/app.py 中的 STARTUP_REPORT_ENV 一致，不导入界面模块
+STARTUP_REPORT_ENV = "BMFONT_STARTUP_REPORT"
+
+
+def make_manifest(folder: Path, count: int = 50) -> Path:
+    """
+    生成一组字符图片和清单
+    """
+    folder.mkdir(parents=True, exist_ok=True)
+    for index in range(count):
+        Image.new("RGBA", (16 + index % 16, 24), (255, 255, 255, 255)).save(folder / f"glyph_{index}.png")
+    manifest = {
+        "name": "startup",
+        "output": "out",
+        "images": [f"glyph_{index}.png" for index in range(count)],
+        "characters": "".join(chr(0x4E00 + index) for index in range(count)),
+    }
+    path = folder / "manifest.json"
+    path.write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf8")
+    return path
+
+
+def child_env() -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH")]))
+    return env
+
+
+def time_command(command: list[str], repeat: int, env: dict | None = None) -> list[float]:
+    """
+    运行命令多次，返回每次的耗时
+    """
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, env=env or child_env(), cwd=ROOT, check=True, capture_output=True)
+        seconds.append(time.perf_counter() - start)
+    return seconds
+
+
+def time_gui(command: list[str], repeat: int) -> dict[str, list[float]]:
+    """
+    启动图形界面多次，窗口显示后程序自动退出，返回导入完成、窗口显示和进程结束的耗时
+    """
+    env = child_env()
+    env[STARTUP_REPORT_ENV] = "1"
+    times: dict[str, list[float]] = {"imported": [], "window": [], "exit": []}
+    for _ in range(repeat):
+        start, start_perf = time.time(), time.perf_counter()
+        completed = subprocess.run(command, env=env, cwd=ROOT, check=True, capture_output=True, text=True)
+        times["exit"].append(time.perf_counter() - start_perf)
+        report = next(json.loads(line) for line in completed.stdout.splitlines() if line.startswith("{"))
+        times["imported"].append(report["imported"] - start)
+        times["window"].append(report["window"] - start)
+    return times
+
+
+def summarize(seconds: list[float]) -> dict:
+    return {"median": statistics.median(seconds), "min": min(seconds), "runs": seconds}
+
+
+def run(repeat: int, gui: bool, gui_command: list[str]) -> dict:
+    """
+    运行所有场景
+    Args:
+        repeat: 每个场景运行的次数
+        gui: 是否测试图形界面
+        gui_command: 启动图形界面的命令
+
+    Returns:
+        测试结果
+    """
+    python = sys.executable
+    results = {
+        "import_core": summarize(
+            time_command([python, "-c", "import bmfont.service.font_generator, bmfont.service.manifest"], repeat)
+        ),
+        "cli_help": summarize(time_command([python, "-m", "bmfont", "build", "--help"], repeat)),
+    }
+    with tempfile.TemporaryDirectory(prefix="bmfont-startup-") as temp:
+        manifest = make_manifest(Path(temp))
+        command = [python, "-m", "bmfont", "build", str(manifest)]
+        # 先构建一次，之后的构建都只检查缓存
+        time_command(command, 1)
+        results["cli_cached_build"] = summarize(time_command(command, repeat))
+    if gui:
+        results.update({f"gui_{key}": summarize(value) for key, value in time_gui(gui_command, repeat).items()})
+
+    for name, result in results.items():
+        print(
+            f"{name:>18}：中位数 {result['median'] * 1000:.0f} ms，最快 {result['min'] * 1000:.0f} ms", file=sys.stderr
+        )
+    return {"python": platform.python_version(), "platform": platform.platform(), "results": results}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="启动耗时测试")
+    parser.add_argument("--repeat", type=int, default=5, help="每个场景运行的次数，默认 5")
+    parser.add_argument("--no-gui", action="store_true", help="不测试图形界面，没有显示器时使用")
+    parser.add_argument("--gui-command", nargs="+", help="启动图形界面的命令，默认 python -m bmfont")
+    parser.add_argument("-o", "--output", help="结果保存路径，默认输出到标准输出")
+    args = parser.parse_args(argv)
+
+    gui_command = args.gui_command or [sys.executable, "-m", "bmfont"]
+    report = json.dumps(run(args.repeat, not args.no_gui, gui_command), ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(report, encoding="utf8")
+    else:
+        print(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,42 +1,16 @@
-import asyncio
-import functools
 import sys
-from asyncio import Future
 
-import qasync
-from PySide6.QtCore import QLocale
-from PySide6.QtWidgets import QApplication
-from qfluentwidgets import FluentTranslator
 
-from bmfont.ui.view.main import MainWindow
-
-
-async def async_main():
-    def close_future(_future):
-        loop = asyncio.get_event_loop()
-        loop.call_later(10, _future.cancel)
-        _future.cancel()
-
-    future: Future = asyncio.Future()
-
-    app = QApplication.instance()
-    if hasattr(app, "aboutToQuit"):
-        app.aboutToQuit.connect(functools.partial(close_future, future))
-
-    locale = QLocale(QLocale.Chinese, QLocale.China)
-    translator = FluentTranslator(locale)
-    app.installTranslator(translator)
+def main():
+    # 命令行模式不导入任何 Qt 相关的模块
+    if len(sys.argv) > 1 and sys.argv[1] in ("build", "watch"):
+        from bmfont.cli import main as cli_main
 
-    window = MainWindow()
-    window.show()
-    await future
+        sys.exit(cli_main(sys.argv[1:]))
 
+    from bmfont.ui.app import run_app
 
-def main():
-    try:
-        qasync.run(async_main())
-    except asyncio.exceptions.CancelledError:
-        sys.exit(0)
+    sys.exit(run_app())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,230 @@
+import argparse
+import os
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from loguru import logger
+
+from bmfont.service.descriptor import DESCRIPTOR_WRITERS
+from bmfont.service.manifest import FontManifest, ManifestError, load_manifests
+from bmfont.service.profiler import GenerationResult
+
+
+def build_font(
+    manifest: FontManifest,
+    workers: int = 1,
+    force: bool = False,
+    formats: list[str] | None = None,
+    profile: bool = False,
+    report_dir: str = "",
+) -> GenerationResult:
+    """
+    构建一个字体，在子进程中执行
+    Args:
+        manifest: 字体清单
+        workers: 加载字符图片的并发数
+        force: 是否忽略构建缓存强制重新生成
+        formats: 描述文件格式，覆盖清单中的配置
+        profile: 是否在日志中输出各阶段的耗时和数量
+        report_dir: 各阶段统计的 JSON 报告目录，为空时不保存
+
+    Returns:
+        生成结果
+    """
+    # 清单中指定的并发数优先
+    overrides: dict = {} if "workers" in manifest.options else {"workers": workers}
+    if force:
+        overrides["use_cache"] = False
+    if formats:
+        overrides["formats"] = formats
+    if profile:
+        overrides["log_profile"] = True
+    if report_dir:
+        overrides["report_path"] = str(Path(report_dir) / f"{manifest.name}.profile.json")
+    generator = manifest.create_generator(**overrides)
+    return generator.generate_font()
+
+
+def build(
+    manifest_paths: list[str],
+    jobs: int = 0,
+    workers: int = 1,
+    force: bool = False,
+    formats: list[str] | None = None,
+    profile: bool = False,
+    report_dir: str = "",
+) -> int:
+    """
+    按清单批量构建字体
+    Args:
+        manifest_paths: 清单文件路径
+        jobs: 同时构建的字体数量，0 表示使用 CPU 核数
+        workers: 每个字体加载字符图片的并发数
+        force: 是否忽略构建缓存强制重新生成
+        formats: 描述文件格式，覆盖清单中的配置
+        profile: 是否在日志中输出各阶段的耗时和数量
+        report_dir: 各阶段统计的 JSON 报告目录，为空时不保存
+
+    Returns:
+        退出码，有字体构建失败时不为 0
+    """
+    manifests: list[FontManifest] = []
+    for path in manifest_paths:
+        try:
+            manifests.extend(load_manifests(path))
+        except ManifestError as e:
+            logger.error(str(e))
+            return 2
+
+    if not manifests:
+        logger.warning("清单中没有需要构建的字体")
+        return 0
+
+    jobs = min(jobs or os.cpu_count() or 1, len(manifests))
+    failed = 0
+    for manifest, result in _build_all(manifests, jobs, workers, force, formats, profile, report_dir):
+        if isinstance(result, Exception):
+            failed += 1
+            logger.error(f"{manifest.source} 构建字体 {manifest.name} 失败：{result}")
+        elif not profile:
+            # --profile 时生成器已经输出了详细统计
+            logger.info(f"{manifest.name}：{result.summary()}")
+
+    logger.info(f"构建完成：成功 {len(manifests) - failed} 个，失败 {failed} 个")
+    return 1 if failed else 0
+
+
+def _build_all(
+    manifests: list[FontManifest], jobs: int, *args
+) -> Iterator[tuple[FontManifest, GenerationResult | Exception]]:
+    """
+    构建所有字体，按完成的顺序返回结果
+    Args:
+        manifests: 字体清单
+        jobs: 同时构建的字体数量
+        args: build_font 的其他参数
+
+    Returns:
+        (字体清单, 生成结果或构建时的异常)
+    """
+    if jobs <= 1:
+        # 只构建一个字体时在当前进程中执行，省去启动子进程、重新导入模块的时间
+        for manifest in manifests:
+            try:
+                yield manifest, build_font(manifest, *args)
+            except Exception as e:
+                yield manifest, e
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = {executor.submit(build_font, manifest, *args): manifest for manifest in manifests}
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result()
+            except Exception as e:
+                yield futures[future], e
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m bmfont", description="图片字体制作工具")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="按清单文件批量构建字体，不启动界面")
+    build_parser.add_argument("manifests", nargs="+", help="清单文件（JSON）")
+    build_parser.add_argument("-j", "--jobs", type=int, default=0, help="同时构建的字体数量，默认使用 CPU 核数")
+    build_parser.add_argument("--workers", type=int, default=1, help="每个字体加载字符图片的并发数，默认 1")
+    build_parser.add_argument("-f", "--force", action="store_true", help="忽略构建缓存，强制重新生成")
+    build_parser.add_argument(
+        "--format",
+        dest="formats",
+        action="append",
+        choices=list(DESCRIPTOR_WRITERS),
+        help="描述文件格式，可以指定多次，默认使用清单中的配置（text）",
+    )
+    build_parser.add_argument("--profile", action="store_true", help="输出各阶段的耗时、数量和峰值内存")
+    build_parser.add_argument("--report", dest="report_dir", default="", help="各阶段统计的 JSON 报告保存目录")
+
+    watch_parser = subparsers.add_parser("watch", help="监视字符图片和清单，文件变化后重新生成受影响的字体")
+    watch_parser.add_argument("manifests", nargs="+", help="清单文件（JSON）")
+    watch_parser.add_argument("--workers", type=int, default=1, help="每个字体加载字符图片的并发数，默认 1")
+    watch_parser.add_argument(
+        "--debounce", type=float, default=0.1, help="最后一个文件事件之后等待的秒数，期间的修改合并为一次构建，默认 0.1"
+    )
+    watch_parser.add_argument("--poll", action="store_true", help="定时检查文件，不使用 inotify")
+    watch_parser.add_argument("--poll-interval", type=float, default=0.2, help="定时检查的间隔秒数，默认 0.2")
+    watch_parser.add_argument(
+        "--format", dest="formats", action="append", choices=list(DESCRIPTOR_WRITERS), help="描述文件格式，可以指定多次"
+    )
+
+    return parser
+
+
+def watch(
+    manifest_paths: list[str],
+    workers: int = 1,
+    debounce: float = 0.1,
+    polling: bool = False,
+    poll_interval: float = 0.2,
+    formats: list[str] | None = None,
+) -> int:
+    """
+    监视模式，按 Ctrl+C 退出
+    Args:
+        manifest_paths: 清单文件路径
+        workers: 每个字体加载字符图片的并发数
+        debounce: 合并文件事件的等待秒数
+        polling: 是否强制定时检查文件
+        poll_interval: 定时检查的间隔秒数
+        formats: 描述文件格式，覆盖清单中的配置
+
+    Returns:
+        退出码
+    """
+    from bmfont.service.watch import FontWatcher
+
+    watcher = FontWatcher(
+        manifest_paths,
+        debounce=debounce,
+        polling=polling,
+        poll_interval=poll_interval,
+        workers=workers,
+        formats=formats,
+    )
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        logger.info("已停止监视")
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    命令行入口
+    Args:
+        argv: 命令行参数，不包含程序名
+
+    Returns:
+        退出码
+    """
+    args = create_parser().parse_args(argv)
+    if args.command == "build":
+        return build(
+            args.manifests,
+            jobs=args.jobs,
+            workers=args.workers,
+            force=args.force,
+            formats=args.formats,
+            profile=args.profile,
+            report_dir=args.report_dir,
+        )
+    if args.command == "watch":
+        return watch(
+            args.manifests,
+            workers=args.workers,
+            debounce=args.debounce,
+            polling=args.poll,
+            poll_interval=args.poll_interval,
+            formats=args.formats,
+        )
+    return 2
@@ -1 +1,31 @@
-from .font_generator import FontGenerator
+"""
+字体生成的核心功能，不依赖 Qt，图形界面和命令行共用
+
+导出的类在第一次使用时才导入对应的模块，Pillow、NumPy 也只在真正处理图片时导入，命令行和界面启动更快
+按名称动态导入的模块 Nuitka 跟踪不到，打包脚本用 --include-package=bmfont 包含所有模块
+"""
+
+# 导出的名称 -> 所在的模块
+_EXPORTS = {
+    "ChannelPackedGenerator": ".channel_pack",
+    "FontGenerator": ".font_generator",
+    "GenerationCancelled": ".font_generator",
+    "FontOutput": ".output",
+    "FolderOutput": ".output",
+    "MemoryOutput": ".output",
+    "StreamOutput": ".output",
+    "STAGES": ".profiler",
+    "GenerationResult": ".profiler",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
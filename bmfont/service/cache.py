@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from loguru import logger
+
+from .glyph import Glyph
+
+# 缓存格式或生成逻辑变化时递增，使旧缓存失效
+CACHE_VERSION = 1
+
+
+def hash_file(path: str) -> str:
+    """
+    计算文件内容的哈希
+    Args:
+        path: 文件路径
+
+    Returns:
+        十六进制哈希
+    """
+    digest = hashlib.blake2b()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BuildCache:
+    """
+    增量构建缓存
+
+    以字符图片内容、字符、偏移和生成参数的哈希作为键，记录在输出目录下。
+    键没有变化且输出文件都还在时跳过构建。
+    文件哈希按路径、大小和修改时间缓存，输入没有变化时不需要重新读取图片。
+    """
+
+    def __init__(self, output_folder: Path, name: str):
+        self.path = output_folder / f".{name}.bmfont-cache.json"
+        self.record = self._read()
+        # 上次记录的文件哈希 {路径: [大小, 修改时间, 哈希]}
+        self._old_files: dict[str, list] = self.record.get("files", {})
+        self.files: dict[str, list] = {}
+
+    def _read(self) -> dict:
+        try:
+            record = json.loads(self.path.read_text(encoding="utf8"))
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(record, dict) or record.get("version") != CACHE_VERSION:
+            return {}
+        return record
+
+    def file_digest(self, path: str) -> str:
+        """
+        获取文件内容的哈希，文件大小和修改时间没变时直接使用上次的结果
+        Args:
+            path: 文件路径
+
+        Returns:
+            十六进制哈希
+        """
+        stat = os.stat(path)
+        old = self._old_files.get(path)
+        if old and old[0] == stat.st_size and old[1] == stat.st_mtime_ns:
+            digest = old[2]
+        else:
+            digest = hash_file(path)
+        self.files[path] = [stat.st_size, stat.st_mtime_ns, digest]
+        return digest
+
+    @staticmethod
+    def compute_key(glyphs: list[Glyph], settings: dict) -> str:
+        """
+        计算构建的键
+        Args:
+            glyphs: 已经计算过内容哈希的字符
+            settings: 影响输出结果的生成参数
+
+        Returns:
+            十六进制哈希
+        """
+        content = {
+            "version": CACHE_VERSION,
+            "settings": settings,
+            "glyphs": [[glyph.value, glyph.digest, glyph.xoffset, glyph.yoffset, glyph.xadvance] for glyph in glyphs],
+        }
+        data = json.dumps(content, sort_keys=True, ensure_ascii=False).encode("utf8")
+        return hashlib.blake2b(data).hexdigest()
+
+    def is_fresh(self, key: str) -> bool:
+        """
+        上次构建的键相同且输出文件都还在
+        Args:
+            key: 本次构建的键
+
+        Returns:
+            是否可以跳过构建
+        """
+        if self.record.get("key") != key:
+            return False
+        return all(Path(output).exists() for output in self.record.get("outputs", []))
+
+    def save(self, key: str, outputs: list[Path]) -> None:
+        """
+        记录本次构建
+        Args:
+            key: 本次构建的键
+            outputs: 输出文件
+        """
+        self.record = {
+            "version": CACHE_VERSION,
+            "key": key,
+            "outputs": [str(output) for output in outputs],
+            "files": self.files,
+        }
+        # 先写临时文件再替换，中途退出时不会留下内容不完整的缓存
+        temp_path = self.path.with_name(f"{self.path.name}.tmp")
+        try:
+            temp_path.write_text(json.dumps(self.record, ensure_ascii=False), encoding="utf8")
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logger.warning(f"写入构建缓存失败：{e}")
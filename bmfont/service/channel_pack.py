@@ -0,0 +1,129 @@
+from loguru import logger
+
+from .descriptor import CharInfo, FontDescriptor
+from .font_generator import FontGenerator
+from .glyph import Glyph
+from .output import FontOutput
+from .packer import PackResult
+from .profiler import GenerationResult
+
+# 按顺序使用的通道：(RGBA 数组中的下标, 描述文件中 chnl 的值)，chnl 为 1 蓝、2 绿、4 红、8 透明度
+CHANNELS = [(0, 4), (1, 2), (2, 1), (3, 8)]
+
+
+class ChannelPackedGenerator(FontGenerator):
+    """
+    把最多 4 个单色字体分别放进一张大图的 R、G、B、A 通道
+
+    每个字体单独装箱，字符的透明度写入所在的通道，每个字体生成自己的描述文件（packed=1，chnl 为所在通道），
+    共用同一张大图。纹理占用和切换纹理的次数最多减少到原来的 1/4。
+    """
+
+    def __init__(self, fonts: dict[str, list[dict]], output_folder: str, name: str, **kwargs):
+        """
+        Args:
+            fonts: 字体名称 -> 字符数据列表，按顺序放进 R、G、B、A 通道
+            output_folder: 输出目录
+            name: 大图名称
+            kwargs: 其他参数见 FontGenerator，颜色模式只能是 rgba
+        """
+        if not 1 <= len(fonts) <= len(CHANNELS):
+            raise ValueError(f"通道打包最多支持 {len(CHANNELS)} 个字体，当前 {len(fonts)} 个")
+        empty = [font_name for font_name, font_data in fonts.items() if not font_data]
+        if empty:
+            raise ValueError(f"字体没有字符：{', '.join(empty)}")
+        if kwargs.get("color_mode", "rgba") != "rgba":
+            raise ValueError("通道打包的大图只能使用 rgba 颜色模式")
+        character_data = [char_data for font_data in fonts.values() for char_data in font_data]
+        super().__init__(character_data=character_data, output_folder=output_folder, name=name, **kwargs)
+        self.fonts = fonts
+        self.settings["fonts"] = {font_name: len(font_data) for font_name, font_data in fonts.items()}
+
+    def _generate(self, glyphs: list[Glyph], output: FontOutput, result: GenerationResult) -> None:
+        # 与单个字体相同，最多保留一页大图面积的像素，其余字符合成到所在的页（带）时再解码
+        glyphs, edges = self._load_for_packing(glyphs)
+
+        # 按字体拆分，每个字体单独装箱
+        font_glyphs: list[list[Glyph]] = []
+        font_kernings = []
+        start = 0
+        for font_data in self.fonts.values():
+            end = start + len(font_data)
+            font_glyphs.append(glyphs[start:end])
+            font_kernings.append(self._compute_kernings(glyphs[start:end], None if edges is None else edges[start:end]))
+            start = end
+
+        self._report("pack", 0, len(font_glyphs))
+        font_aliases: list[dict[int, list[int]]] = []
+        font_pages: list[list[PackResult]] = []
+        for font_index, items in enumerate(font_glyphs):
+            aliases = self._find_aliases(items)
+            font_aliases.append(aliases)
+            with self.profiler.stage("pack") as stats:
+                font_pages.append(
+                    self.atlas_packer.pack([items[index].packed_size for index in aliases], self._check_cancelled)
+                )
+                stats.count += len(aliases)
+            self._report("pack", font_index + 1, len(font_glyphs))
+
+        # 所有字体的所有页使用相同的尺寸
+        all_pages = [page for pages in font_pages for page in pages]
+        fnt_img_width = max(page.width for page in all_pages)
+        fnt_img_height = max(page.height for page in all_pages)
+        page_count = max(len(pages) for pages in font_pages)
+        page_names = [self._get_page_name(page_id, page_count) for page_id in range(page_count)]
+
+        font_chars: list[dict[int, CharInfo]] = [{} for _ in font_glyphs]
+        total = sum(len(aliases) for aliases in font_aliases)
+        composited = 0
+        self._report("composite", composited, total)
+        with self.profiler.stage("composite"):
+            for page_id, page_name in enumerate(page_names):
+                logger.info(f"第{page_id + 1}/{page_count}页大图尺寸：width: {fnt_img_width} height: {fnt_img_height}")
+                # 每个字体只取透明度，写入所在的通道
+                placements = []
+                for font_index, (items, aliases, pages) in enumerate(
+                    zip(font_glyphs, font_aliases, font_pages, strict=True)
+                ):
+                    if page_id >= len(pages):
+                        continue
+                    channel, chnl = CHANNELS[font_index]
+                    packed_indices = list(aliases)
+                    for i, (x, y) in zip(pages[page_id].indices, pages[page_id].positions, strict=True):
+                        packed_index = packed_indices[i]
+                        placements.append((x, y, items[packed_index], channel))
+                        for index in aliases[packed_index]:
+                            font_chars[font_index][index] = self._create_char_info(items[index], x, y, page_id, chnl)
+                            if index != packed_index:
+                                items[index].release()
+                encoded = self._composite_page(
+                    placements, fnt_img_width, fnt_img_height, output, page_name, composited, total
+                )
+                composited += len(placements)
+                self._log_saved_page(page_id, page_count, encoded)
+
+        # 每个字体一份描述文件，共用大图
+        self._report("write", 0, len(font_glyphs))
+        for font_index, (font_name, items) in enumerate(zip(self.fonts, font_glyphs, strict=True)):
+            char_img_height = max((glyph.height for glyph in items), default=0)
+            line_height, base = self._line_metrics(char_img_height)
+            descriptor = FontDescriptor(
+                face=font_name,
+                size=char_img_height,
+                line_height=line_height,
+                base=base,
+                scale_w=fnt_img_width,
+                scale_h=fnt_img_height,
+                pages=[output.location(page_name) for page_name in page_names],
+                chars=[font_chars[font_index][index] for index in range(len(items))],
+                kernings=font_kernings[font_index],
+                spacing=(self.spacing, self.spacing),
+                padding=self._padding,
+                packed=True,
+            )
+            self._write_descriptors(descriptor, output, font_name)
+            self._report("write", font_index + 1, len(font_glyphs))
+
+        result.packed_glyphs = total
+        result.pages = page_count
+        result.width, result.height = fnt_img_width, fnt_img_height
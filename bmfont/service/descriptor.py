@@ -0,0 +1,430 @@
+import json
+import re
+import struct
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass, field
+from xml.etree import ElementTree  # nosec B405 只用来生成 XML，不解析外部输入
+
+
+@dataclass
+class CharInfo:
+    """
+    字体描述文件中的一个字符
+    """
+
+    id: int
+    x: int
+    y: int
+    width: int
+    height: int
+    xoffset: int
+    yoffset: int
+    xadvance: int
+    page: int = 0
+    chnl: int = 15
+
+
+# 文本格式中字符的字段，顺序与 CharInfo 一致
+CHAR_FIELDS = ("id", "x", "y", "width", "height", "xoffset", "yoffset", "xadvance", "page", "chnl")
+
+
+@dataclass
+class KerningInfo:
+    """
+    字体描述文件中的一个字距调整
+    """
+
+    first: int
+    second: int
+    amount: int
+
+
+@dataclass
+class FontDescriptor:
+    """
+    字体描述信息，各种格式的描述文件都从这里生成
+    """
+
+    size: int
+    line_height: int
+    base: int
+    scale_w: int
+    scale_h: int
+    # 每页大图的文件名
+    pages: list[str] = field(default_factory=list)
+    chars: list[CharInfo] = field(default_factory=list)
+    kernings: list[KerningInfo] = field(default_factory=list)
+    face: str = ""
+    spacing: tuple[int, int] = (1, 1)
+    padding: tuple[int, int, int, int] = (0, 0, 0, 0)
+    packed: bool = False
+    # 通道内容：0 字形，1 描边，2 字形加描边，3 全 0，4 全 1
+    alpha_chnl: int = 0
+    red_chnl: int = 0
+    green_chnl: int = 0
+    blue_chnl: int = 0
+
+
+class DescriptorWriter(ABC):
+    """
+    字体描述文件生成器基类
+    """
+
+    name: str = ""
+    # 生成的文件后缀
+    suffix: str = ""
+
+    @abstractmethod
+    def dumps(self, descriptor: FontDescriptor) -> bytes:
+        """
+        生成描述文件内容
+        Args:
+            descriptor: 字体描述信息
+
+        Returns:
+            文件内容
+        """
+
+
+class TextWriter(DescriptorWriter):
+    """
+    BMFont 文本格式
+    """
+
+    name = "text"
+    suffix = ".fnt"
+
+    def dumps(self, descriptor: FontDescriptor) -> bytes:
+        d = descriptor
+        lines = [
+            f'info face="{d.face}" size={d.size} bold=0 italic=0 charset="" unicode=1 stretchH=100 smooth=1 aa=1 '
+            f"padding={','.join(map(str, d.padding))} spacing={d.spacing[0]},{d.spacing[1]} outline=0",
+            f"common lineHeight={d.line_height} base={d.base} "
+            f"scaleW={d.scale_w} scaleH={d.scale_h} pages={len(d.pages)} packed={int(d.packed)} "
+            f"alphaChnl={d.alpha_chnl} redChnl={d.red_chnl} greenChnl={d.green_chnl} blueChnl={d.blue_chnl}",
+            *(f'page id={page_id} file="{page}"' for page_id, page in enumerate(d.pages)),
+            f"chars count={len(d.chars)}",
+            *(
+                f"char id={c.id} x={c.x} y={c.y} width={c.width} height={c.height} "
+                f"xoffset={c.xoffset} yoffset={c.yoffset} xadvance={c.xadvance} page={c.page} chnl={c.chnl}"
+                for c in d.chars
+            ),
+        ]
+        if d.kernings:
+            lines.append(f"kernings count={len(d.kernings)}")
+            lines.extend(f"kerning first={k.first} second={k.second} amount={k.amount}" for k in d.kernings)
+        return "\n".join(lines).encode("utf8")
+
+
+class XmlWriter(DescriptorWriter):
+    """
+    BMFont XML 格式
+    """
+
+    name = "xml"
+    suffix = ".xml"
+
+    def dumps(self, descriptor: FontDescriptor) -> bytes:
+        d = descriptor
+        root = ElementTree.Element("font")
+        ElementTree.SubElement(
+            root,
+            "info",
+            face=d.face,
+            size=str(d.size),
+            bold="0",
+            italic="0",
+            charset="",
+            unicode="1",
+            stretchH="100",
+            smooth="1",
+            aa="1",
+            padding=",".join(map(str, d.padding)),
+            spacing=f"{d.spacing[0]},{d.spacing[1]}",
+            outline="0",
+        )
+        ElementTree.SubElement(
+            root,
+            "common",
+            lineHeight=str(d.line_height),
+            base=str(d.base),
+            scaleW=str(d.scale_w),
+            scaleH=str(d.scale_h),
+            pages=str(len(d.pages)),
+            packed=str(int(d.packed)),
+            alphaChnl=str(d.alpha_chnl),
+            redChnl=str(d.red_chnl),
+            greenChnl=str(d.green_chnl),
+            blueChnl=str(d.blue_chnl),
+        )
+        pages = ElementTree.SubElement(root, "pages")
+        for page_id, page in enumerate(d.pages):
+            ElementTree.SubElement(pages, "page", id=str(page_id), file=page)
+        chars = ElementTree.SubElement(root, "chars", count=str(len(d.chars)))
+        for char in d.chars:
+            ElementTree.SubElement(chars, "char", {key: str(value) for key, value in asdict(char).items()})
+        if d.kernings:
+            kernings = ElementTree.SubElement(root, "kernings", count=str(len(d.kernings)))
+            for kerning in d.kernings:
+                ElementTree.SubElement(kernings, "kerning", {key: str(value) for key, value in asdict(kerning).items()})
+        ElementTree.indent(root)
+        return ElementTree.tostring(root, encoding="utf-8", xml_declaration=True)
+
+
+class JsonWriter(DescriptorWriter):
+    """
+    JSON 格式，字段名与 BMFont 一致
+    """
+
+    name = "json"
+    suffix = ".json"
+
+    def dumps(self, descriptor: FontDescriptor) -> bytes:
+        d = descriptor
+        data = {
+            "info": {
+                "face": d.face,
+                "size": d.size,
+                "unicode": 1,
+                "stretchH": 100,
+                "smooth": 1,
+                "aa": 1,
+                "padding": list(d.padding),
+                "spacing": list(d.spacing),
+                "outline": 0,
+            },
+            "common": {
+                "lineHeight": d.line_height,
+                "base": d.base,
+                "scaleW": d.scale_w,
+                "scaleH": d.scale_h,
+                "pages": len(d.pages),
+                "packed": int(d.packed),
+                "alphaChnl": d.alpha_chnl,
+                "redChnl": d.red_chnl,
+                "greenChnl": d.green_chnl,
+                "blueChnl": d.blue_chnl,
+            },
+            "pages": d.pages,
+            "chars": [asdict(char) for char in d.chars],
+            "kernings": [asdict(kerning) for kerning in d.kernings],
+        }
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf8")
+
+
+class BinaryWriter(DescriptorWriter):
+    """
+    BMFont 二进制格式（第 3 版），所有数值为小端序
+    """
+
+    name = "binary"
+    suffix = ".bin"
+
+    def dumps(self, descriptor: FontDescriptor) -> bytes:
+        d = descriptor
+        blocks = [b"BMF\x03"]
+
+        # 块 1：info，bitField 第 0 位 smooth，第 1 位 unicode
+        info = struct.pack(
+            "<hBBHBBBBBBBB",
+            d.size,
+            0b11,
+            0,
+            100,
+            1,
+            d.padding[0],
+            d.padding[1],
+            d.padding[2],
+            d.padding[3],
+            d.spacing[0],
+            d.spacing[1],
+            0,
+        )
+        blocks.append(self._block(1, info + d.face.encode("utf8") + b"\0"))
+
+        # 块 2：common，bitField 第 7 位 packed
+        common = struct.pack(
+            "<HHHHHBBBBB",
+            d.line_height,
+            d.base,
+            d.scale_w,
+            d.scale_h,
+            len(d.pages),
+            0x80 if d.packed else 0,
+            d.alpha_chnl,
+            d.red_chnl,
+            d.green_chnl,
+            d.blue_chnl,
+        )
+        blocks.append(self._block(2, common))
+
+        # 块 3：pages，每个文件名以 \0 结尾，且长度必须相同
+        page_names = [page.encode("utf8") for page in d.pages]
+        if len({len(name) for name in page_names}) > 1:
+            raise ValueError("二进制格式要求所有大图文件名长度相同")
+        blocks.append(self._block(3, b"".join(name + b"\0" for name in page_names)))
+
+        # 块 4：chars，每个字符 20 字节
+        char_struct = struct.Struct("<IHHHHhhhBB")
+        blocks.append(
+            self._block(
+                4,
+                b"".join(
+                    char_struct.pack(
+                        c.id, c.x, c.y, c.width, c.height, c.xoffset, c.yoffset, c.xadvance, c.page, c.chnl
+                    )
+                    for c in d.chars
+                ),
+            )
+        )
+
+        # 块 5：kerning pairs，每对 10 字节，没有时省略
+        if d.kernings:
+            kerning_struct = struct.Struct("<IIh")
+            blocks.append(
+                self._block(5, b"".join(kerning_struct.pack(k.first, k.second, k.amount) for k in d.kernings))
+            )
+
+        return b"".join(blocks)
+
+    @staticmethod
+    def _block(block_type: int, data: bytes) -> bytes:
+        return struct.pack("<BI", block_type, len(data)) + data
+
+
+# 文本格式中的 key=value，值可以带引号
+TEXT_FIELD = re.compile(r'(\w+)=("[^"]*"|\S*)')
+
+
+def _ints(value: str, count: int) -> tuple[int, ...]:
+    numbers = tuple(int(item) for item in value.split(",") if item)
+    if len(numbers) != count:
+        raise ValueError(f"应该有 {count} 个数字：{value}")
+    return numbers
+
+
+def _parse_text_line(descriptor: FontDescriptor, pages: dict[int, str], tag: str, fields: dict[str, str]) -> None:
+    """
+    解析文本格式的一行，写入描述信息
+    """
+    if tag == "char":
+        descriptor.chars.append(CharInfo(**{key: int(fields[key]) for key in CHAR_FIELDS if key in fields}))
+    elif tag == "kerning":
+        descriptor.kernings.append(KerningInfo(int(fields["first"]), int(fields["second"]), int(fields["amount"])))
+    elif tag == "page":
+        pages[int(fields["id"])] = fields["file"]
+    elif tag == "info":
+        descriptor.face = fields.get("face", "")
+        descriptor.size = abs(int(fields.get("size", 0)))
+        if "padding" in fields:
+            up, right, down, left = _ints(fields["padding"], 4)
+            descriptor.padding = (up, right, down, left)
+        if "spacing" in fields:
+            horizontal, vertical = _ints(fields["spacing"], 2)
+            descriptor.spacing = (horizontal, vertical)
+    elif tag == "common":
+        descriptor.line_height = int(fields.get("lineHeight", 0))
+        descriptor.base = int(fields.get("base", 0))
+        descriptor.scale_w = int(fields.get("scaleW", 0))
+        descriptor.scale_h = int(fields.get("scaleH", 0))
+        descriptor.packed = fields.get("packed", "0") == "1"
+        descriptor.alpha_chnl = int(fields.get("alphaChnl", 0))
+        descriptor.red_chnl = int(fields.get("redChnl", 0))
+        descriptor.green_chnl = int(fields.get("greenChnl", 0))
+        descriptor.blue_chnl = int(fields.get("blueChnl", 0))
+
+
+def parse_text(data: bytes) -> FontDescriptor:
+    """
+    解析 BMFont 文本格式
+    Args:
+        data: 文件内容
+
+    Returns:
+        字体描述信息
+    """
+    descriptor = FontDescriptor(size=0, line_height=0, base=0, scale_w=0, scale_h=0)
+    pages: dict[int, str] = {}
+    for line_number, line in enumerate(data.decode("utf-8-sig").splitlines(), 1):
+        tag, _, rest = line.strip().partition(" ")
+        fields = {key: value.strip('"') for key, value in TEXT_FIELD.findall(rest)}
+        try:
+            _parse_text_line(descriptor, pages, tag, fields)
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"第 {line_number} 行格式不正确：{line.strip()}") from e
+    descriptor.pages = [pages[page_id] for page_id in sorted(pages)]
+    return descriptor
+
+
+def parse_binary(data: bytes) -> FontDescriptor:
+    """
+    解析 BMFont 二进制格式（第 3 版）
+    Args:
+        data: 文件内容
+
+    Returns:
+        字体描述信息
+    """
+    if data[:4] != b"BMF\x03":
+        raise ValueError(f"不支持的二进制格式版本：{data[:4]!r}")
+    descriptor = FontDescriptor(size=0, line_height=0, base=0, scale_w=0, scale_h=0)
+    offset = 4
+    while offset < len(data):
+        block_type, length = struct.unpack_from("<BI", data, offset)
+        offset += 5
+        block = data[offset : offset + length]
+        offset += length
+        if block_type == 1:
+            size, _bits, _charset, _stretch, _aa, *padding, spacing_h, spacing_v, _outline = struct.unpack_from(
+                "<hBBHBBBBBBBB", block
+            )
+            descriptor.size = abs(size)
+            descriptor.padding = tuple(padding)
+            descriptor.spacing = (spacing_h, spacing_v)
+            descriptor.face = block[14:].split(b"\0", 1)[0].decode("utf8")
+        elif block_type == 2:
+            (
+                descriptor.line_height,
+                descriptor.base,
+                descriptor.scale_w,
+                descriptor.scale_h,
+                _pages,
+                bits,
+                descriptor.alpha_chnl,
+                descriptor.red_chnl,
+                descriptor.green_chnl,
+                descriptor.blue_chnl,
+            ) = struct.unpack_from("<HHHHHBBBBB", block)
+            descriptor.packed = bool(bits & 0x80)
+        elif block_type == 3:
+            descriptor.pages = [name.decode("utf8") for name in block.split(b"\0") if name]
+        elif block_type == 4:
+            descriptor.chars = [CharInfo(*values) for values in struct.iter_unpack("<IHHHHhhhBB", block)]
+        elif block_type == 5:
+            descriptor.kernings = [KerningInfo(*values) for values in struct.iter_unpack("<IIh", block)]
+    return descriptor
+
+
+def parse_descriptor(data: bytes) -> FontDescriptor:
+    """
+    解析描述文件，根据文件头区分二进制和文本格式
+    Args:
+        data: 文件内容
+
+    Returns:
+        字体描述信息
+    """
+    if data.startswith(b"BMF"):
+        try:
+            return parse_binary(data)
+        except struct.error as e:
+            raise ValueError(f"二进制描述文件不完整：{e}") from e
+    return parse_text(data)
+
+
+DESCRIPTOR_WRITERS: dict[str, type[DescriptorWriter]] = {
+    TextWriter.name: TextWriter,
+    XmlWriter.name: XmlWriter,
+    JsonWriter.name: JsonWriter,
+    BinaryWriter.name: BinaryWriter,
+}
@@ -0,0 +1,302 @@
+import struct
+import time
+import zlib
+from dataclasses import dataclass
+from typing import IO, TYPE_CHECKING, Protocol, cast
+
+from loguru import logger
+
+if TYPE_CHECKING:
+    import numpy as np
+    from PIL import Image
+
+# 压缩配置：fast 编码最快，max 文件最小
+ENCODING_PROFILES: dict[str, dict] = {
+    "fast": {"compress_level": 1},
+    "balanced": {"compress_level": 6},
+    "max": {"compress_level": 9, "optimize": True},
+}
+
+# 颜色模式：rgba 为 32 位原图；palette 量化为带透明度的 8 位调色板；alpha 只保存透明度通道
+COLOR_MODES = ("rgba", "palette", "alpha")
+
+# 分带写入 PNG 时，压缩后的数据每积累这么多字节写出一个 IDAT 块
+IDAT_CHUNK_SIZE = 1 << 16
+# 分带写入 PNG 时每次计算过滤方式的行数，限制临时数组的内存
+FILTER_ROWS = 16
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# 描述文件中的通道内容：0 字形，4 全 1
+CHANNEL_GLYPH = 0
+CHANNEL_ONE = 4
+
+
+class WritableStream(Protocol):
+    """
+    大图的输出流，只需要支持 write、tell 和 flush，例如 output.CountingWriter
+    """
+
+    def write(self, data: bytes, /) -> int: ...
+
+    def tell(self) -> int: ...
+
+    def flush(self) -> None: ...
+
+
+@dataclass
+class EncodeResult:
+    """
+    一页大图的编码结果
+    """
+
+    # 文件大小，单位字节
+    size: int
+    # 编码并写入的耗时，单位秒
+    seconds: float
+
+
+class AtlasEncoder:
+    """
+    大图编码器，按压缩配置和颜色模式保存 PNG
+    """
+
+    def __init__(self, profile: str = "balanced", color_mode: str = "rgba", palette_colors: int = 256):
+        """
+        Args:
+            profile: 压缩配置，fast、balanced 或 max
+            color_mode: 颜色模式，rgba、palette 或 alpha
+            palette_colors: 调色板模式的颜色数量，2 到 256
+        """
+        if profile not in ENCODING_PROFILES:
+            raise ValueError(f"不支持的压缩配置：{profile}，可选：{', '.join(ENCODING_PROFILES)}")
+        if color_mode not in COLOR_MODES:
+            raise ValueError(f"不支持的颜色模式：{color_mode}，可选：{', '.join(COLOR_MODES)}")
+        if not 2 <= palette_colors <= 256:
+            raise ValueError(f"调色板颜色数量必须在 2 到 256 之间：{palette_colors}")
+        self.profile = profile
+        self.color_mode = color_mode
+        self.palette_colors = palette_colors
+
+    @property
+    def channels(self) -> dict[str, int]:
+        """
+        描述文件中 alphaChnl、redChnl、greenChnl、blueChnl 的值
+        """
+        if self.color_mode == "alpha":
+            # 与 BMFont 的 8 位纹理相同：唯一的通道是透明度，颜色为白色
+            return {
+                "alpha_chnl": CHANNEL_GLYPH,
+                "red_chnl": CHANNEL_ONE,
+                "green_chnl": CHANNEL_ONE,
+                "blue_chnl": CHANNEL_ONE,
+            }
+        return {
+            "alpha_chnl": CHANNEL_GLYPH,
+            "red_chnl": CHANNEL_GLYPH,
+            "green_chnl": CHANNEL_GLYPH,
+            "blue_chnl": CHANNEL_GLYPH,
+        }
+
+    def convert(self, image: "Image.Image") -> "Image.Image":
+        """
+        按颜色模式转换大图
+        Args:
+            image: RGBA 大图
+
+        Returns:
+            转换后的图片
+        """
+        if self.color_mode == "palette":
+            from PIL import Image
+
+            # 快速八叉树是 Pillow 中唯一支持透明度的量化方法
+            return image.quantize(colors=self.palette_colors, method=Image.Quantize.FASTOCTREE)
+        if self.color_mode == "alpha":
+            self._check_monochrome(image)
+            # 保存为 8 位灰度图，灰度值就是透明度
+            return image.getchannel("A")
+        return image
+
+    def open_png(self, stream: WritableStream, width: int, height: int) -> "PngStreamWriter":
+        """
+        按颜色模式逐带写入大图
+        Args:
+            stream: 输出流
+            width: 大图宽度
+            height: 大图高度
+
+        Returns:
+            PNG 写入器，从上到下写入 RGBA 像素
+        """
+        if self.color_mode == "palette":
+            raise ValueError("调色板模式需要整张大图一起量化，不能分带写入")
+        compress_level = ENCODING_PROFILES[self.profile]["compress_level"]
+        return PngStreamWriter(stream, width, height, self.color_mode, compress_level)
+
+    def save(self, image: "Image.Image", stream: WritableStream) -> EncodeResult:
+        """
+        转换大图并写入二进制流
+        Args:
+            image: RGBA 大图
+            stream: 输出流，需要支持 write 和 tell
+
+        Returns:
+            编码结果
+        """
+        start = time.perf_counter()
+        offset = stream.tell()
+        # Pillow 只要求输出流支持 write，没有 fileno 时不会直接写入文件描述符
+        self.convert(image).save(cast(IO[bytes], stream), format="PNG", **ENCODING_PROFILES[self.profile])
+        seconds = time.perf_counter() - start
+        return EncodeResult(size=stream.tell() - offset, seconds=seconds)
+
+    @staticmethod
+    def _check_monochrome(image: "Image.Image") -> None:
+        """
+        只保存透明度会丢掉颜色，可见像素的颜色不一致时给出警告
+        """
+        import numpy as np
+
+        if not is_monochrome(np.asarray(image)):
+            logger.warning("字符图片不是单色的，只保存透明度通道会丢失颜色")
+
+
+def is_monochrome(pixels: "np.ndarray") -> bool:
+    """
+    RGBA 像素中可见像素的颜色是否都相同
+    """
+    rgb = pixels[..., :3][pixels[..., 3] > 0]
+    return not len(rgb) or bool((rgb == rgb[0]).all())
+
+
+class PngStreamWriter:
+    """
+    从上到下逐带写入 PNG，只保留当前一带的像素和压缩缓冲，内存与大图尺寸无关
+
+    每行分别计算 PNG 的 5 种过滤方式，选择差值绝对值之和最小的一种（与 libpng 的启发式相同），
+    压缩后的数据分成多个 IDAT 块写出，不需要事先知道压缩后的大小。
+    """
+
+    def __init__(
+        self, stream: WritableStream, width: int, height: int, color_mode: str = "rgba", compress_level: int = 6
+    ):
+        """
+        Args:
+            stream: 输出流
+            width: 图片宽度
+            height: 图片高度
+            color_mode: rgba 保存 32 位 RGBA；alpha 只保存透明度，写入 8 位灰度图
+            compress_level: zlib 压缩等级，0 到 9
+        """
+        import numpy as np
+
+        if color_mode not in ("rgba", "alpha"):
+            raise ValueError(f"不支持逐带写入的颜色模式：{color_mode}")
+        self.stream = stream
+        self.width = width
+        self.height = height
+        self.color_mode = color_mode
+        self.channels = 4 if color_mode == "rgba" else 1
+        self.rows = 0
+        # 写入的字节数
+        self.size = 0
+        self._compressor = zlib.compressobj(compress_level)
+        self._buffer = bytearray()
+        # 上一行，用于 Up、Average、Paeth 过滤，第一行之前视为全 0
+        self._previous = np.zeros(width * self.channels, dtype=np.uint8)
+        self._warned = False
+
+        # 8 位深度；颜色类型 6 为 RGBA，0 为灰度
+        color_type = 6 if color_mode == "rgba" else 0
+        self.stream.write(PNG_SIGNATURE)
+        self.size += len(PNG_SIGNATURE)
+        self._write_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0))
+
+    def __enter__(self) -> "PngStreamWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        # 出错时不写结尾，调用方会丢弃不完整的文件
+        if exc_type is None:
+            self.close()
+
+    def write(self, pixels: "np.ndarray") -> None:
+        """
+        写入接下来的若干行
+        Args:
+            pixels: RGBA 像素，形状为 (行数, 宽度, 4)
+        """
+        if self.rows + len(pixels) > self.height:
+            raise ValueError(f"写入的行数超过图片高度：{self.rows + len(pixels)} > {self.height}")
+        if self.color_mode == "alpha":
+            if not self._warned and not is_monochrome(pixels):
+                logger.warning("字符图片不是单色的，只保存透明度通道会丢失颜色")
+                self._warned = True
+            pixels = pixels[..., 3]
+        rows = pixels.reshape(len(pixels), -1)
+        for start in range(0, len(rows), FILTER_ROWS):
+            block = rows[start : start + FILTER_ROWS]
+            self._buffer += self._compressor.compress(self._filter(block).tobytes())
+            self._previous = block[-1].copy()
+        self.rows += len(rows)
+        if len(self._buffer) >= IDAT_CHUNK_SIZE:
+            self._flush_idat()
+
+    def close(self) -> None:
+        """
+        写入剩余的压缩数据和文件结尾
+        """
+        if self.rows != self.height:
+            raise ValueError(f"写入的行数与图片高度不一致：{self.rows} != {self.height}")
+        self._buffer += self._compressor.flush()
+        self._flush_idat()
+        self._write_chunk(b"IEND", b"")
+
+    def _filter(self, rows: "np.ndarray") -> "np.ndarray":
+        """
+        按行选择过滤方式
+        Args:
+            rows: 原始像素，形状为 (行数, 每行字节数)
+
+        Returns:
+            每行开头为过滤方式的数据，形状为 (行数, 每行字节数 + 1)
+        """
+        import numpy as np
+
+        bpp = self.channels
+        raw = rows.astype(np.int16)
+        up = np.vstack((self._previous[None], rows[:-1])).astype(np.int16)
+        left = np.zeros_like(raw)
+        left[:, bpp:] = raw[:, :-bpp]
+        up_left = np.zeros_like(raw)
+        up_left[:, bpp:] = up[:, :-bpp]
+
+        estimate = left + up - up_left
+        distance_left = np.abs(estimate - left)
+        distance_up = np.abs(estimate - up)
+        distance_up_left = np.abs(estimate - up_left)
+        paeth = np.where(
+            (distance_left <= distance_up) & (distance_left <= distance_up_left),
+            left,
+            np.where(distance_up <= distance_up_left, up, up_left),
+        )
+
+        # None、Sub、Up、Average、Paeth，按 PNG 的过滤方式编号排列；转换为 uint8 即取模 256
+        candidates = np.stack((raw, raw - left, raw - up, raw - (left + up) // 2, raw - paeth)).astype(np.uint8)
+        costs = np.abs(candidates.view(np.int8).astype(np.int16)).sum(axis=2)
+        best = costs.argmin(axis=0)
+        filtered = np.empty((len(rows), rows.shape[1] + 1), dtype=np.uint8)
+        filtered[:, 0] = best
+        filtered[:, 1:] = candidates[best, np.arange(len(rows))]
+        return filtered
+
+    def _flush_idat(self) -> None:
+        if self._buffer:
+            self._write_chunk(b"IDAT", bytes(self._buffer))
+            self._buffer.clear()
+
+    def _write_chunk(self, chunk_type: bytes, data: bytes) -> None:
+        crc = zlib.crc32(data, zlib.crc32(chunk_type))
+        chunk = struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", crc)
+        self.stream.write(chunk)
+        self.size += len(chunk)
@@ -0,0 +1,89 @@
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from PIL import Image
+
+from .descriptor import FontDescriptor, parse_descriptor
+from .glyph import CHNL_BANDS, ImageRegion
+
+
+@dataclass
+class ImportedFont:
+    """
+    从已有的 BMFont 字体导入的字符
+    """
+
+    descriptor: FontDescriptor
+    # 字符数据列表，可以直接传给 FontGenerator
+    character_data: list[dict] = field(default_factory=list)
+
+    @property
+    def options(self) -> dict:
+        """
+        保持原来排版和字距的生成参数
+        """
+        return {
+            "line_height": self.descriptor.line_height,
+            "base": self.descriptor.base,
+            "kernings": self.descriptor.kernings,
+        }
+
+
+def find_page(fnt_path: Path, file: str) -> Path:
+    """
+    查找大图文件：先相对描述文件所在的目录，再按原路径，最后只按文件名在描述文件所在的目录中查找
+    """
+    candidates = [fnt_path.parent / file, Path(file), fnt_path.parent / Path(file).name]
+    for candidate in candidates:
+        if candidate.is_file():
+            return candidate
+    raise FileNotFoundError(f"{fnt_path} 的大图 {file} 不存在")
+
+
+def open_page(path: Path) -> Image.Image:
+    """
+    解码一页大图，灰度图为只保存透明度的单色字体，转换为白色加透明度
+    """
+    with Image.open(path) as image:
+        if image.mode == "L":
+            white = Image.new("L", image.size, 255)
+            return Image.merge("RGBA", (white, white, white, image))
+        return image.convert("RGBA")
+
+
+def load_fnt(path: str | Path) -> ImportedFont:
+    """
+    读取 BMFont 描述文件（文本或二进制格式）和大图，每页大图只解码一次，字符为大图中的区域，不生成临时文件
+    Args:
+        path: 描述文件路径
+
+    Returns:
+        导入的字体
+    """
+    path = Path(path)
+    descriptor = parse_descriptor(path.read_bytes())
+    page_paths = [find_page(path, file) for file in descriptor.pages]
+    pages = [open_page(page_path) for page_path in page_paths]
+
+    imported = ImportedFont(descriptor)
+    for char in descriptor.chars:
+        if not 0 <= char.id <= 0x10FFFF:
+            continue
+        if char.page >= len(pages):
+            raise ValueError(f"{path} 中字符 {char.id} 的大图 {char.page} 不存在")
+        # 只有通道打包的字体需要区分通道，其他字体的 chnl 按所有通道处理
+        chnl = char.chnl if descriptor.packed else 15
+        if chnl != 15 and chnl not in CHNL_BANDS:
+            raise ValueError(f"{path} 中字符 {char.id} 的通道 {chnl} 不是单个通道")
+        box = (char.x, char.y, char.x + char.width, char.y + char.height)
+        imported.character_data.append(
+            {
+                "image_path": str(page_paths[char.page]),
+                "image": ImageRegion(pages[char.page], box, chnl),
+                "value": chr(char.id),
+                "xoffset": char.xoffset,
+                "yoffset": char.yoffset,
+                "xadvance": char.xadvance,
+            }
+        )
+    return imported
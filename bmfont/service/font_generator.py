@@ -1,8 +1,26 @@
+import functools
+import os
+import re
+import threading
+import time
 from collections import UserDict
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 from loguru import logger
-from PIL import Image
+
+from .cache import BuildCache
+from .descriptor import DESCRIPTOR_WRITERS, CharInfo, FontDescriptor, KerningInfo
+from .encoder import CHANNEL_ONE, AtlasEncoder, EncodeResult
+from .glyph import Glyph, GlyphCache, load_glyph, map_glyphs, probe_glyph
+from .output import FolderOutput, FontOutput, MemoryOutput
+from .packer import AtlasPacker
+from .profiler import GenerationResult, Profiler, peak_rss
+
+if TYPE_CHECKING:
+    from PIL import Image
 
 
 class FontData(UserDict):
@@ -14,84 +32,905 @@ class FontData(UserDict):
     yoffset: int
 
 
+# 进度回调：(阶段, 已完成数量, 总数量)，在生成所在的线程中调用
+ProgressCallback = Callable[[str, int, int], None]
+
+
+class GenerationCancelled(Exception):
+    """
+    生成被取消
+    """
+
+
 class FontGenerator:
-    def __init__(self, character_data: list[dict], output_folder: str, name: str):
+    def __init__(
+        self,
+        character_data: list[dict],
+        output_folder: str,
+        name: str,
+        packer: str = "maxrects",
+        spacing: int = 1,
+        power_of_two: bool = False,
+        square: bool = False,
+        max_page_size: int = 0,
+        trim: bool = False,
+        workers: int = 0,
+        use_processes: bool = False,
+        use_cache: bool = True,
+        dedupe: bool = False,
+        formats: Iterable[str] = ("text",),
+        encoding: str = "balanced",
+        color_mode: str = "rgba",
+        palette_colors: int = 256,
+        sdf: bool = False,
+        sdf_spread: int = 4,
+        sdf_downscale: int = 1,
+        line_height: int = 0,
+        base: int = 0,
+        kerning: bool = False,
+        kerning_gap: int | None = None,
+        kerning_threshold: int = 1,
+        kerning_max_pairs: int = 10000,
+        kernings: Iterable[KerningInfo] = (),
+        band_height: int = 0,
+        progress_callback: ProgressCallback | None = None,
+        log_profile: bool = False,
+        report_path: str = "",
+        glyph_cache: GlyphCache | None = None,
+    ):
+        """
+        Args:
+            character_data: 字符数据列表
+            output_folder: 输出目录
+            name: 字体名称
+            packer: 装箱算法，maxrects 或 skyline
+            spacing: 字符图片之间的间距
+            power_of_two: 大图宽高是否必须为 2 的幂
+            square: 大图是否必须为正方形
+            max_page_size: 每页大图的最大宽高，超出时分成多页，0 表示不限制
+            trim: 是否裁掉字符图片四周的透明区域
+            workers: 并发加载字符图片的数量，0 表示使用 CPU 核数
+            use_processes: 是否使用进程池加载字符图片，默认使用线程池
+            use_cache: 输入和参数都没有变化时是否跳过生成
+            dedupe: 像素完全相同的字符是否共用大图中的同一块区域，需要在装箱前解码所有字符图片
+            formats: 生成的描述文件格式，可选 text、xml、json、binary
+            encoding: 大图的压缩配置，fast、balanced 或 max
+            color_mode: 大图的颜色模式，rgba；palette 量化为带透明度的 8 位调色板；alpha 只保存透明度，用于单色字体
+            palette_colors: 调色板模式的颜色数量
+            sdf: 是否生成有符号距离场，透明度通道保存到字形边缘的距离，运行时可以任意缩放
+            sdf_spread: 距离场覆盖的范围，单位为原图像素，字符四周会各扩展这么多像素
+            sdf_downscale: 距离场的缩小倍数，大图和所有尺寸都按这个倍数缩小
+            line_height: 行高，0 表示使用字符图片中最大的高度；导入已有字体时保持原来的排版
+            base: 基线到行顶部的距离，0 表示与行高相同
+            kerning: 是否根据字形边缘自动生成所有字符对的字距调整
+            kerning_gap: 字距调整的目标间距，为空时使用所有字符对间距的中位数
+            kerning_threshold: 绝对值小于这个值的字距调整不写入描述文件
+            kerning_max_pairs: 最多写入的字距数量，超出时只保留调整最大的字符对，0 表示不限制
+            kernings: 已有的字距调整，例如导入的字体原来的字距，只保留两个字符都在字体中的字符对；
+                与自动生成的字距合并，同一字符对以自动生成的为准
+            band_height: 分带合成的高度，大于 0 时按装箱结果从上到下逐带合成大图并逐带编码写出，
+                字符在所在的带合成时才解码，峰值内存只与带高有关，与大图尺寸和字符数量无关；0 表示整页合成
+            progress_callback: 进度回调，参数为阶段（见 STAGES）、已完成数量和总数量
+            log_profile: 是否在日志中输出各阶段的耗时和数量
+            report_path: 各阶段统计的 JSON 报告路径，为空时不保存
+            glyph_cache: 解码结果缓存，多次生成时传入同一个缓存，没有变化的字符图片不再解码
+        """
         self.character_data = character_data
         self.output_folder = Path(output_folder)
+        self.name = name
         self.fnt_img_path = self.output_folder / f"{name}.png"
         self.fnt_cfg_path = self.output_folder / f"{name}.fnt"
+        self.spacing = spacing
+        self.trim = trim
+        self.workers = workers or os.cpu_count() or 1
+        self.use_processes = use_processes
+        self.use_cache = use_cache
+        self.dedupe = dedupe
+        self.max_page_size = max_page_size
+        self.progress_callback = progress_callback
+        self.log_profile = log_profile
+        self.report_path = report_path
+        self.glyph_cache = glyph_cache
+        self.profiler = Profiler()
+        if sdf and (sdf_spread < 1 or sdf_downscale < 1):
+            raise ValueError(f"距离场的范围和缩小倍数必须大于 0：{sdf_spread}, {sdf_downscale}")
+        self.sdf = sdf
+        self.sdf_spread = sdf_spread
+        self.sdf_downscale = sdf_downscale
+        self.line_height = line_height
+        self.base = base
+        self.kerning = kerning
+        self.kerning_gap = kerning_gap
+        self.kerning_threshold = kerning_threshold
+        self.kerning_max_pairs = kerning_max_pairs
+        self.kernings = list(kernings)
+        if band_height < 0:
+            raise ValueError(f"分带合成的高度不能小于 0：{band_height}")
+        if band_height and color_mode == "palette":
+            raise ValueError("调色板模式需要整张大图一起量化，不能分带合成")
+        self.band_height = band_height
+        self._cancel_event = threading.Event()
+        self.formats = list(dict.fromkeys(formats))
+        for fmt in self.formats:
+            if fmt not in DESCRIPTOR_WRITERS:
+                raise ValueError(f"不支持的描述文件格式：{fmt}，可选：{', '.join(DESCRIPTOR_WRITERS)}")
+        # 影响输出结果的生成参数，用于计算构建缓存的键
+        self.settings = {
+            "name": name,
+            "output_folder": str(self.output_folder),
+            "packer": packer,
+            "spacing": spacing,
+            "power_of_two": power_of_two,
+            "square": square,
+            "max_page_size": max_page_size,
+            "trim": trim,
+            "dedupe": dedupe,
+            "formats": self.formats,
+            "encoding": encoding,
+            "color_mode": color_mode,
+            "palette_colors": palette_colors,
+            "sdf": sdf,
+            "sdf_spread": sdf_spread,
+            "sdf_downscale": sdf_downscale,
+            "line_height": line_height,
+            "base": base,
+            "kerning": kerning,
+            "kerning_gap": kerning_gap,
+            "kerning_threshold": kerning_threshold,
+            "kerning_max_pairs": kerning_max_pairs,
+            "kernings": [[kerning.first, kerning.second, kerning.amount] for kerning in self.kernings],
+            "band_height": band_height,
+        }
+        self.encoder = AtlasEncoder(profile=encoding, color_mode=color_mode, palette_colors=palette_colors)
+        self.atlas_packer = AtlasPacker(
+            algorithm=packer,
+            spacing=spacing,
+            power_of_two=power_of_two,
+            square=square,
+            max_width=max_page_size,
+            max_height=max_page_size,
+        )
+
+    def cancel(self) -> None:
+        """
+        取消生成，可以在其他线程中调用，正在进行的生成会抛出 GenerationCancelled
+        """
+        self._cancel_event.set()
+
+    def generate_font(self, output: FontOutput | None = None) -> GenerationResult:
+        """
+        生成字体
+        Args:
+            output: 写入目标，默认写入输出目录并使用构建缓存；传入时不使用构建缓存
+
+        Returns:
+            生成结果和各阶段的统计
+        """
+        self._cancel_event.clear()
+        self.profiler = Profiler()
+        glyphs = [Glyph.from_character_data(char_data) for char_data in self.character_data]
+        result = GenerationResult(name=self.name, glyphs=len(glyphs))
+
+        # 输入和参数都没有变化时跳过生成
+        cache, cache_key = self._check_cache(glyphs) if output is None else (None, "")
+        if cache and not cache_key:
+            result.skipped = True
+            return self._finish(result)
+
+        if output is None:
+            output = FolderOutput(self.output_folder)
+        # 所有文件都写完才提交，失败或取消时丢弃，输出目录中的旧文件保持不变
+        try:
+            self._generate(glyphs, output, result)
+            output.commit()
+        except BaseException:
+            output.discard()
+            raise
+        if isinstance(output, FolderOutput):
+            self._remove_stale_outputs(output, cache)
+
+        if cache:
+            cache.save(cache_key, [self.output_folder / name for name in output.sizes])
+
+        result.outputs = [output.location(name) for name in output.sizes]
+        result.output_bytes = sum(output.sizes.values())
+        logger.success(f"生成完成！输出共 {result.output_bytes / 1024:.1f} KB")
+        return self._finish(result)
+
+    def generate_bytes(self) -> dict[str, bytes]:
+        """
+        在内存中生成字体，不访问磁盘
+        Returns:
+            文件名 -> 文件内容，包括所有页的大图和所有格式的描述文件，描述文件中的大图只有文件名
+        """
+        output = MemoryOutput()
+        self.generate_font(output)
+        return output.files
+
+    def _generate(self, glyphs: list[Glyph], output: FontOutput, result: GenerationResult) -> None:
+        """
+        合成大图并写入大图和描述文件
+        Args:
+            glyphs: 字符列表
+            output: 写入目标
+            result: 生成结果，填写字符、页数和尺寸
+        """
+        glyphs, edges = self._load_for_packing(glyphs)
+        kernings = self._compute_kernings(glyphs, edges)
+
+        # 像素相同的字符只放一次，aliases 记录每个放进大图的字符对应的所有字符
+        aliases = self._find_aliases(glyphs)
+        packed_indices = list(aliases)
+
+        # 获取字符图片中最大的高度
+        char_img_height = max(glyph.height for glyph in glyphs)
+
+        # 计算每个字符在大图中的位置
+        self._report("pack", 0, 1)
+        with self.profiler.stage("pack") as stats:
+            pages = self.atlas_packer.pack(
+                [glyphs[index].packed_size for index in packed_indices], self._check_cancelled
+            )
+            stats.count += len(packed_indices)
+        self._report("pack", 1, 1)
+        fnt_img_width = max(page.width for page in pages)
+        fnt_img_height = max(page.height for page in pages)
+        page_names = [self._get_page_name(page_id, len(pages)) for page_id in range(len(pages))]
+
+        # 每页单独合成并立即保存，同一时间只占用一页大图的内存
+        chars: dict[int, CharInfo] = {}
+        composited = 0
+        self._report("composite", composited, len(packed_indices))
+        with self.profiler.stage("composite"):
+            for page_id, (page, page_name) in enumerate(zip(pages, page_names, strict=True)):
+                # 所有页使用相同的尺寸，引擎按 scaleW/scaleH 计算纹理坐标
+                page.width, page.height = fnt_img_width, fnt_img_height
+                logger.info(
+                    f"第{page_id + 1}/{len(pages)}页大图尺寸：width: {page.width} height: {page.height} "
+                    f"装箱效率：{page.efficiency:.2%}"
+                )
+
+                # 描述信息只需要位置和尺寸，先全部生成，再合成；相同图片的字符指向同一块区域
+                placements = []
+                for i, (x, y) in zip(page.indices, page.positions, strict=True):
+                    packed_index = packed_indices[i]
+                    placements.append((x, y, glyphs[packed_index], None))
+                    for index in aliases[packed_index]:
+                        chars[index] = self._create_char_info(glyphs[index], x, y, page_id)
+                        if index != packed_index:
+                            glyphs[index].release()
+                encoded = self._composite_page(
+                    placements, page.width, page.height, output, page_name, composited, len(packed_indices)
+                )
+                composited += len(placements)
+                self._log_saved_page(page_id, len(pages), encoded)
+
+        # 所有格式的描述文件都从同一份描述信息生成
+        line_height, base = self._line_metrics(char_img_height)
+        channels = self._channels
+        descriptor = FontDescriptor(
+            face=self.name,
+            size=char_img_height,
+            line_height=line_height,
+            base=base,
+            scale_w=fnt_img_width,
+            scale_h=fnt_img_height,
+            pages=[output.location(page_name) for page_name in page_names],
+            chars=[chars[index] for index in range(len(glyphs))],
+            kernings=kernings,
+            spacing=(self.spacing, self.spacing),
+            padding=self._padding,
+            alpha_chnl=channels["alpha_chnl"],
+            red_chnl=channels["red_chnl"],
+            green_chnl=channels["green_chnl"],
+            blue_chnl=channels["blue_chnl"],
+        )
+        self._report("write", 0, len(self.formats))
+        self._write_descriptors(descriptor, output)
+        self._report("write", len(self.formats), len(self.formats))
+
+        result.packed_glyphs = len(packed_indices)
+        result.pages = len(pages)
+        result.width, result.height = fnt_img_width, fnt_img_height
+
+    def _remove_stale_outputs(self, output: FolderOutput, cache: BuildCache | None) -> None:
+        """
+        删除以前生成、这次没有生成的文件，例如页数变化后多出的大图、不再生成的描述文件格式
+        Args:
+            output: 已经提交的输出目录
+            cache: 构建缓存，记录了上次生成的文件
+        """
+        stale = {Path(path) for path in cache.record.get("outputs", [])} if cache else set()
+        # 没有缓存记录时也按文件名找出以前的大图：只有一页时为 name.png，多页时为 name_页码.png
+        page_pattern = re.compile(rf"{re.escape(self.name)}(_\d+)?\.png")
+        stale.update(path for path in output.folder.iterdir() if page_pattern.fullmatch(path.name))
+        current = {path.resolve() for path in output.paths}
+        for path in stale:
+            if path.resolve() in current or not path.exists():
+                continue
+            try:
+                path.unlink()
+            except OSError as e:
+                logger.warning(f"无法删除以前生成的文件 {path}：{e}")
+            else:
+                logger.info(f"删除以前生成的文件 {path}")
+
+    def _report(self, stage: str, done: int, total: int) -> None:
+        """
+        报告进度，同时检查是否已经取消
+        """
+        self._check_cancelled()
+        if self.progress_callback:
+            self.progress_callback(stage, done, total)
+
+    def _check_cancelled(self) -> None:
+        """
+        已经取消时抛出 GenerationCancelled
+        """
+        if self._cancel_event.is_set():
+            raise GenerationCancelled()
+
+    def _finish(self, result: GenerationResult) -> GenerationResult:
+        """
+        填写统计，按配置输出日志和报告
+        """
+        result.seconds = self.profiler.elapsed
+        result.stages = self.profiler.stages
+        result.peak_rss = peak_rss()
+        if self.log_profile:
+            result.log()
+        if self.report_path:
+            result.save(self.report_path)
+        return result
+
+    def _save_page(self, image: "Image.Image", output: FontOutput, name: str) -> EncodeResult:
+        """
+        编码并写入一页大图，单独统计编码的耗时
+        """
+        with self.profiler.stage("encode") as stats, output.open(name) as stream:
+            encoded = self.encoder.save(image, stream)
+            stats.count += 1
+            stats.bytes += encoded.size
+        return encoded
+
+    @staticmethod
+    def _log_saved_page(page_id: int, page_count: int, encoded: EncodeResult) -> None:
+        """
+        输出一页大图的大小和编码耗时
+        """
+        logger.info(
+            f"保存第{page_id + 1}/{page_count}页大图：{encoded.size / 1024:.1f} KB，"
+            f"编码耗时 {encoded.seconds * 1000:.0f} ms"
+        )
+
+    def _composite_page(
+        self,
+        placements: Sequence[tuple[int, int, Glyph, int | None]],
+        width: int,
+        height: int,
+        output: FontOutput,
+        name: str,
+        done: int,
+        total: int,
+    ) -> EncodeResult:
+        """
+        合成一页大图并写入，设置了分带合成的高度时逐带合成（见 _composite_bands），否则整页合成，
+        没有保留像素的字符在这里解码，写入后释放
+        Args:
+            placements: 放进这一页的字符 [(x, y, 字符, 通道)]，通道为 RGBA 数组中的下标，只写入透明度；None 表示写入所有通道
+            width: 大图宽度
+            height: 大图高度
+            output: 写入目标
+            name: 大图文件名
+            done: 之前已经合成的字符数量，用于报告进度
+            total: 所有页的字符数量
+
+        Returns:
+            编码结果
+        """
+        if self.band_height:
+            return self._composite_bands(placements, width, height, output, name, done, total)
+        # 跳过生成时不需要 Pillow 和 NumPy，需要时才导入，减少启动时间
+        import numpy as np
+        from PIL import Image
+
+        pixels = np.zeros((height, width, 4), dtype=np.uint8)
+        # 并发解码这一页中没有保留像素的字符，按顺序逐个写入
+        decoded = self._decode_released([glyph for _x, _y, glyph, _channel in placements])
+        for (x, y, placed, channel), glyph in zip(placements, decoded, strict=True):
+            glyph_width, glyph_height = glyph.packed_size
+            if glyph_width and glyph_height:
+                assert glyph.image is not None, f"字符 {glyph.value} 的图片没有解码"
+                target = pixels[y : y + glyph_height, x : x + glyph_width]
+                if channel is None:
+                    target[:] = np.asarray(glyph.image)
+                else:
+                    target[..., channel] = np.asarray(glyph.image)[..., 3]
+            placed.release()
+            glyph.release()
+            done += 1
+            self.profiler.add("composite", count=1)
+            self._report("composite", done, total)
+        return self._save_page(Image.fromarray(pixels, "RGBA"), output, name)
+
+    def _composite_bands(
+        self,
+        placements: Sequence[tuple[int, int, Glyph, int | None]],
+        width: int,
+        height: int,
+        output: FontOutput,
+        name: str,
+        done: int,
+        total: int,
+    ) -> EncodeResult:
+        """
+        按装箱结果从上到下逐带合成一页大图并写入，字符在所在的第一带合成时才解码，经过的最后一带写完后释放
+        Args:
+            placements: 放进这一页的字符 [(x, y, 字符, 通道)]，通道为 RGBA 数组中的下标，只写入透明度；None 表示写入所有通道
+            width: 大图宽度
+            height: 大图高度
+            output: 写入目标
+            name: 大图文件名
+            done: 之前已经合成的字符数量，用于报告进度
+            total: 所有页的字符数量
+
+        Returns:
+            编码结果
+        """
+        import numpy as np
+
+        decode = self._decode_func(preload=True, hash_pixels=False)
+        order = sorted(range(len(placements)), key=lambda i: placements[i][1])
+        # 已经解码、还没有写完的字符：序号 -> 像素
+        live: dict[int, np.ndarray] = {}
+        position = 0
+        seconds = 0.0
+        with output.open(name) as stream:
+            png = self.encoder.open_png(stream, width, height)
+            for top in range(0, height, self.band_height):
+                bottom = min(top + self.band_height, height)
+                # 并发解码从这一带开始的字符
+                starting = []
+                while position < len(order) and placements[order[position]][1] < bottom:
+                    starting.append(order[position])
+                    position += 1
+                for i, glyph in zip(
+                    starting, self._map_glyphs(decode, [placements[i][2] for i in starting]), strict=True
+                ):
+                    channel = placements[i][3]
+                    if glyph.image is not None and all(glyph.packed_size):
+                        pixels = np.asarray(glyph.image)
+                        live[i] = pixels if channel is None else np.ascontiguousarray(pixels[..., 3])
+                    glyph.release()
+                    done += 1
+                    self.profiler.add("composite", count=1)
+                    self._report("composite", done, total)
+
+                band = np.zeros((bottom - top, width, 4), dtype=np.uint8)
+                for i in list(live):
+                    x, y, _glyph, channel = placements[i]
+                    pixels = live[i]
+                    glyph_height, glyph_width = pixels.shape[:2]
+                    first, last = max(top - y, 0), min(bottom - y, glyph_height)
+                    target = band[y + first - top : y + last - top, x : x + glyph_width]
+                    if channel is None:
+                        target[:] = pixels[first:last]
+                    else:
+                        target[..., channel] = pixels[first:last]
+                    if y + glyph_height <= bottom:
+                        del live[i]
+
+                start = time.perf_counter()
+                with self.profiler.stage("encode"):
+                    png.write(band)
+                    if bottom == height:
+                        png.close()
+                seconds += time.perf_counter() - start
+        self.profiler.add("encode", count=1, nbytes=png.size)
+        return EncodeResult(size=png.size, seconds=seconds)
 
-    def generate_font(self) -> None:
-        # 更新每张图片的尺寸
-        for char_data in self.character_data:
-            char_data["width"], char_data["height"] = self._get_character_size(char_data["image_path"])
-
-        # 获取字符图片中最大的宽度和高度
-        char_img_width = max(self.character_data, key=lambda data: data["width"])["width"]
-        char_img_height = max(self.character_data, key=lambda data: data["height"])["height"]
-
-        # 计算大图的尺寸
-        fnt_img_width = (len(self.character_data) + 1) * char_img_width
-        fnt_img_height = char_img_height
-
-        logger.info(f"大图尺寸：width: {fnt_img_width} height: {fnt_img_height}")
-
-        # 创建一个空白的大图
-        combined_image = Image.new("RGBA", (fnt_img_width, fnt_img_height), (0, 0, 0, 0))
-
-        # 创建fnt配置文件的内容
-        fnt_lines = [
-            f"info size={char_img_height} unicode=1 stretchH=100 smooth=1 aa=1 padding=0,0,0,0 spacing=1,1 outline=0 "
-            f"common lineHeight={char_img_height} base={char_img_height} "
-            f"scaleW={fnt_img_width} scaleH={fnt_img_height} pages=1 packed=0 "
-            f'page id=0 file="{self.fnt_img_path}" '
-            f"chars count={len(self.character_data)}"
-        ]
-
-        # 粘贴每个字符图片到大图上，并添加fnt配置信息
-        x, y = 0, 0
-        for _i, char_data in enumerate(self.character_data):
-            image_path: str = char_data.get("image_path", "")
-            character_value: str = char_data.get("value", "")
-            xoffset: int = char_data.get("xoffset", 0)
-            yoffset: int = char_data.get("yoffset", 0)
-            character_image = Image.open(image_path).convert("RGBA")
-
-            # 获取每个字符的实际宽高
-            char_width, char_height = self._get_character_size(image_path)
-
-            # 粘贴字符图片到大图上
-            combined_image.paste(character_image, (x, y))
-
-            # 添加字符的配置信息到fnt配置文件
-            fnt_lines.append(
-                f"char id={ord(character_value)} x={x} y={y} "
-                f"width={char_width} height={char_height} "
-                f"xoffset={xoffset} yoffset={yoffset} xadvance={char_width}"
+    def _line_metrics(self, char_img_height: int) -> tuple[int, int]:
+        """
+        描述文件中的行高和基线，没有指定时使用字符图片中最大的高度
+        Args:
+            char_img_height: 字符图片中最大的高度，距离场模式下已经缩小
+
+        Returns:
+            (行高, 基线)
+        """
+        line_height = round(self.line_height / self.sdf_downscale) if self.line_height else char_img_height
+        base = round(self.base / self.sdf_downscale) if self.base else line_height
+        return line_height, base
+
+    @property
+    def _kerning_alpha_threshold(self) -> int:
+        """
+        计算字距时透明度大于这个值的像素算作字形，距离场的透明度是到边缘的距离，超过一半才是字形内部
+        """
+        if not self.sdf:
+            return 0
+        from .sdf import INSIDE_THRESHOLD
+
+        return INSIDE_THRESHOLD - 1
+
+    @property
+    def _padding(self) -> tuple[int, int, int, int]:
+        """
+        描述文件中的 padding，距离场模式下为每个字符四周扩展的像素
+        """
+        if not self.sdf:
+            return 0, 0, 0, 0
+        padding = round(self.sdf_spread / self.sdf_downscale)
+        return padding, padding, padding, padding
+
+    @property
+    def _channels(self) -> dict[str, int]:
+        """
+        描述文件中各通道的内容，距离场模式下 RGB 为白色
+        """
+        channels = self.encoder.channels
+        if self.sdf:
+            channels.update(red_chnl=CHANNEL_ONE, green_chnl=CHANNEL_ONE, blue_chnl=CHANNEL_ONE)
+        return channels
+
+    def _check_cache(self, glyphs: list[Glyph]) -> tuple[BuildCache | None, str]:
+        """
+        计算字符图片的内容哈希和构建的键
+        Args:
+            glyphs: 字符列表，会写入内容哈希
+
+        Returns:
+            构建缓存和本次构建的键；不使用缓存时缓存为 None，可以跳过生成时键为空
+        """
+        if not self.use_cache:
+            return None, ""
+        cache = BuildCache(self.output_folder, self.name)
+        self._report("hash", 0, len(glyphs))
+        with self.profiler.stage("hash") as stats:
+            digests = self._map_threads(functools.partial(self._source_digest, cache), glyphs)
+            for glyph, digest in zip(glyphs, digests, strict=True):
+                glyph.digest = digest
+            cache_key = cache.compute_key(glyphs, self.settings)
+            stats.count += len(glyphs)
+        self._report("hash", len(glyphs), len(glyphs))
+        if cache.is_fresh(cache_key):
+            logger.success("输入没有变化，跳过生成")
+            return cache, ""
+        return cache, cache_key
+
+    def _decode_func(self, preload: bool, hash_pixels: bool) -> Callable[[Glyph], Glyph]:
+        """
+        读取字符图片的函数
+        Args:
+            preload: 是否解码像素（按配置裁剪、转换为距离场），否则只读取文件头获取尺寸
+            hash_pixels: 是否计算像素哈希
+
+        Returns:
+            可以并发执行的函数
+        """
+        if self.sdf:
+            from .sdf import load_sdf_glyph
+
+            return functools.partial(
+                load_sdf_glyph,
+                trim=self.trim,
+                hash_pixels=hash_pixels,
+                spread=self.sdf_spread,
+                downscale=self.sdf_downscale,
             )
+        if preload:
+            return functools.partial(load_glyph, trim=self.trim, hash_pixels=hash_pixels)
+        return probe_glyph
+
+    def _load_glyphs(
+        self, glyphs: list[Glyph], preload: bool, on_loaded: Callable[[Glyph], None] | None = None
+    ) -> list[Glyph]:
+        """
+        并发读取字符图片，报告进度
+        Args:
+            glyphs: 字符列表
+            preload: 是否解码像素，否则只读取文件头获取尺寸
+            on_loaded: 每个字符读取后调用，可以在这里释放像素
+
+        Returns:
+            读取后的字符，顺序与输入一致
+        """
+        load_func = self._decode_func(preload, hash_pixels=self.dedupe)
+        # 解码参数相同且文件没有变化的字符直接使用缓存的结果；读取后释放像素时不使用缓存
+        load_options = (self.trim, self.dedupe, self.sdf, self.sdf_spread, self.sdf_downscale)
+        glyph_cache = self.glyph_cache if preload and not on_loaded else None
+        cached: dict[int, Glyph] = {}
+        if glyph_cache is not None:
+            for index, glyph in enumerate(glyphs):
+                cached_glyph = glyph_cache.get(glyph, load_options)
+                if cached_glyph:
+                    cached[index] = cached_glyph
+            if cached:
+                logger.info(f"{len(cached)}/{len(glyphs)} 个字符图片没有变化，使用缓存的解码结果")
+
+        loaded_glyphs = []
+        self._report("load", 0, len(glyphs))
+        with self.profiler.stage("load") as stats:
+            results = self._map_glyphs(load_func, [glyph for index, glyph in enumerate(glyphs) if index not in cached])
+            for index, glyph in enumerate(glyphs):
+                if index in cached:
+                    glyph.copy_image_from(cached[index])
+                else:
+                    glyph = next(results)
+                    if glyph_cache is not None:
+                        glyph_cache.put(glyph, load_options)
+                if self.sdf:
+                    # 图片尺寸在转换距离场时已经缩小，偏移是每个字符自己的，在这里缩小
+                    glyph.xoffset = round(glyph.xoffset / self.sdf_downscale)
+                    glyph.yoffset = round(glyph.yoffset / self.sdf_downscale)
+                    if glyph.xadvance is not None:
+                        glyph.xadvance = round(glyph.xadvance / self.sdf_downscale)
+                loaded_glyphs.append(glyph)
+                stats.count += 1
+                # 解码后的像素大小，相同图片的字符共用像素，这里会重复计算
+                if glyph.image:
+                    stats.bytes += glyph.image.width * glyph.image.height * 4
+                if on_loaded:
+                    on_loaded(glyph)
+                self._report("load", len(loaded_glyphs), len(glyphs))
+        return loaded_glyphs
+
+    def _load_for_packing(self, glyphs: list[Glyph]) -> tuple[list[Glyph], list | None]:
+        """
+        读取装箱需要的尺寸、裁剪区域和像素哈希，合成时用 _decode_released 解码没有保留像素的字符
+        Args:
+            glyphs: 字符列表
+
+        Returns:
+            (读取后的字符, 每个字符的边缘)，边缘为 None 时计算字距需要字符的像素
+        """
+        # 需要裁剪、查找相同图片、距离场或字距时必须解码像素，否则只读取文件头
+        preload = self.trim or self.dedupe or self.sdf or self.kerning
+        # 转换距离场的开销大，或者有解码结果缓存（监视模式）时，解码结果保留到粘贴为止；
+        # 否则最多保留一页大图面积的像素，超出的字符得到尺寸、裁剪区域和像素哈希后立即释放，合成时再解码
+        if preload and not self.band_height and (self.sdf or self.glyph_cache is not None):
+            return self._load_glyphs(glyphs, preload), None
+        return self._load_released(glyphs, preload)
+
+    @property
+    def _pixel_budget(self) -> int | None:
+        """
+        读取字符图片后最多保留的像素面积，None 表示不限制
+
+        只有一页大图时大图本身就要容纳所有字符，保留全部像素；可能分页时最多保留一页的面积；
+        分带合成时字符合成到所在的带时才解码，不保留
+        """
+        if self.band_height:
+            return 0
+        if self.max_page_size:
+            return self.max_page_size * self.max_page_size
+        return None
+
+    def _load_released(self, glyphs: list[Glyph], preload: bool) -> tuple[list[Glyph], list | None]:
+        """
+        读取字符图片，像素总面积超出保留的面积后，得到尺寸、裁剪区域和像素哈希就立即释放，合成时再解码；
+        需要字距时先取出字形边缘
+        Args:
+            glyphs: 字符列表
+            preload: 是否解码像素，否则只读取文件头获取尺寸
+
+        Returns:
+            (读取后的字符, 每个字符的边缘)，不计算字距时边缘为 None
+        """
+        budget = self._pixel_budget
+        kept_area = 0
+        edges: list | None = None
+        if self.kerning:
+            from .kerning import glyph_edges
+
+            edges = []
+
+        def on_loaded(glyph: Glyph) -> None:
+            nonlocal budget, kept_area
+            if edges is not None:
+                edges.append(glyph_edges(glyph, self._kerning_alpha_threshold))
+            if glyph.image is None or budget is None:
+                return
+            kept_area += glyph.image.width * glyph.image.height
+            if kept_area > budget:
+                # 超出后不再保留，之后的字符都在合成时解码
+                budget = 0
+                glyph.release()
+
+        return self._load_glyphs(glyphs, preload, on_loaded=on_loaded), edges
+
+    def _decode_released(self, glyphs: list[Glyph]) -> list[Glyph]:
+        """
+        并发解码读取后释放了像素（或者只读取了文件头）的字符，已经有像素的字符不再解码
+        Args:
+            glyphs: 字符列表
+
+        Returns:
+            有像素的字符，顺序与输入一致
+        """
+        released = [glyph.image is None and all(glyph.packed_size) for glyph in glyphs]
+        if not any(released):
+            return glyphs
+        decode = self._decode_func(preload=True, hash_pixels=False)
+        decoded = self._map_glyphs(decode, [glyph for glyph, missing in zip(glyphs, released, strict=True) if missing])
+        return [next(decoded) if missing else glyph for glyph, missing in zip(glyphs, released, strict=True)]
+
+    def _compute_kernings(self, glyphs: list[Glyph], edges: list | None = None) -> list[KerningInfo]:
+        """
+        按配置计算字距调整，并合并已有的字距调整，没有事先计算边缘时字符必须已经解码
+        Args:
+            glyphs: 字符列表
+            edges: 每个字符的边缘，见 kerning.glyph_edges
+
+        Returns:
+            字距调整列表，没有开启也没有已有的字距时为空
+        """
+        kernings = self._auto_kernings(glyphs, edges) if self.kerning else []
+        if not self.kernings:
+            return kernings
+        ids = {ord(glyph.value) for glyph in glyphs}
+        computed = {(kerning.first, kerning.second) for kerning in kernings}
+        # 与字符的偏移一样按距离场的缩小倍数缩小
+        downscale = self.sdf_downscale if self.sdf else 1
+        kept = []
+        for kerning in self.kernings:
+            pair = (kerning.first, kerning.second)
+            if kerning.first not in ids or kerning.second not in ids or pair in computed:
+                continue
+            amount = round(kerning.amount / downscale)
+            if amount:
+                kept.append(KerningInfo(kerning.first, kerning.second, amount))
+        logger.info(f"保留 {len(kept)} 个已有的字距调整")
+        return kept + kernings
+
+    def _auto_kernings(self, glyphs: list[Glyph], edges: list | None = None) -> list[KerningInfo]:
+        """
+        根据字形边缘自动生成字距调整
+        Args:
+            glyphs: 字符列表
+            edges: 每个字符的边缘，见 kerning.glyph_edges
+
+        Returns:
+            字距调整列表
+        """
+        from .kerning import compute_kernings
+
+        self._report("kerning", 0, 1)
+        with self.profiler.stage("kerning") as stats:
+            kernings = compute_kernings(
+                glyphs,
+                self.kerning_gap,
+                self.kerning_threshold,
+                self.kerning_max_pairs,
+                self._kerning_alpha_threshold,
+                edges,
+            )
+            stats.count += len(kernings)
+        self._report("kerning", 1, 1)
+        logger.info(f"生成 {len(kernings)} 个字距调整")
+        return kernings
+
+    @staticmethod
+    def _find_aliases(glyphs: list[Glyph]) -> dict[int, list[int]]:
+        """
+        查找像素相同的字符
+        Args:
+            glyphs: 字符列表
+
+        Returns:
+            放进大图的字符序号 -> 与它像素相同的所有字符序号（包括自己）
+        """
+        aliases: dict[int, list[int]] = {}
+        first_by_hash: dict[str, int] = {}
+        for index, glyph in enumerate(glyphs):
+            first = first_by_hash.setdefault(glyph.pixel_hash, index) if glyph.pixel_hash else index
+            aliases.setdefault(first, []).append(index)
+        if len(aliases) < len(glyphs):
+            logger.info(f"共 {len(glyphs)} 个字符，其中 {len(glyphs) - len(aliases)} 个与其他字符图片相同")
+        return aliases
+
+    @staticmethod
+    def _create_char_info(glyph: Glyph, x: int, y: int, page_id: int, chnl: int = 15) -> CharInfo:
+        """
+        生成字符的描述信息
+        Args:
+            glyph: 字符
+            x: 在大图中的横坐标
+            y: 在大图中的纵坐标
+            page_id: 所在的页
+            chnl: 所在的通道
+
+        Returns:
+            字符描述信息
+        """
+        width, height = glyph.packed_size
+        # 裁掉的边距计入偏移，保证排版不变
+        left, top, _right, _bottom = glyph.box
+        return CharInfo(
+            id=ord(glyph.value),
+            x=x,
+            y=y,
+            width=width,
+            height=height,
+            xoffset=glyph.xoffset + left,
+            yoffset=glyph.yoffset + top,
+            xadvance=glyph.width if glyph.xadvance is None else glyph.xadvance,
+            page=page_id,
+            chnl=chnl,
+        )
+
+    def _write_descriptors(self, descriptor: FontDescriptor, output: FontOutput, name: str = "") -> None:
+        """
+        按配置的格式写入描述文件
+        Args:
+            descriptor: 字体描述信息
+            output: 写入目标
+            name: 描述文件名，默认使用字体名称
+        """
+        name = name or self.name
+        with self.profiler.stage("write") as stats:
+            for fmt in self.formats:
+                writer = DESCRIPTOR_WRITERS[fmt]()
+                data = writer.dumps(descriptor)
+                output.write(f"{name}{writer.suffix}", data)
+                stats.count += 1
+                stats.bytes += len(data)
+
+    def _map_glyphs(self, func: Callable[[Glyph], Glyph], glyphs: list[Glyph]) -> Iterator[Glyph]:
+        """
+        按配置的并发方式处理字符，结果顺序与输入一致
+
+        同一次生成中来源相同的图片只处理一次，其余字符复用处理结果
+        """
+        firsts: dict[str, Glyph] = {}
+        for glyph in glyphs:
+            firsts.setdefault(glyph.source_key, glyph)
+        # 内存中的图片传给子进程需要序列化整张图片，改用线程池
+        use_processes = self.use_processes and not any(glyph.region for glyph in glyphs)
+        if len(firsts) == len(glyphs):
+            yield from map_glyphs(func, glyphs, workers=self.workers, use_processes=use_processes)
+            return
 
-            # 更新坐标
-            x += char_width
-            if x >= fnt_img_width:
-                x = 0
-                y += char_img_height
+        results = map_glyphs(func, list(firsts.values()), workers=self.workers, use_processes=use_processes)
+        processed = dict(zip(firsts, results, strict=True))
+        # 先全部复制再返回，避免调用方释放了第一个字符的像素后才复制
+        for glyph in glyphs:
+            result = processed[glyph.source_key]
+            if result is not glyph:
+                glyph.copy_image_from(result)
+        yield from glyphs
 
-        # 保存大图
-        self.output_folder.mkdir(parents=True, exist_ok=True)
-        if self.fnt_img_path.exists():
-            self.fnt_img_path.unlink()
-        combined_image.save(str(self.fnt_img_path))
+    @staticmethod
+    def _source_digest(cache: BuildCache, glyph: Glyph) -> str:
+        """
+        图片内容的哈希，内存中的图片计算像素的哈希
+        """
+        return glyph.region.digest() if glyph.region else cache.file_digest(glyph.image_path)
 
-        # 保存fnt配置文件
-        if self.fnt_cfg_path.exists():
-            self.fnt_cfg_path.unlink()
-        self.fnt_cfg_path.write_text("\n".join(fnt_lines), encoding="utf8")
+    def _map_threads(self, func: Callable[[Glyph], str], items: list[Glyph]) -> list[str]:
+        """
+        使用线程池处理，结果顺序与输入一致
+        """
+        if self.workers <= 1 or len(items) <= 1:
+            return list(map(func, items))
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(items))) as executor:
+            return list(executor.map(func, items))
 
-        logger.success("生成完成！")
+    def _get_page_name(self, page_id: int, page_count: int) -> str:
+        """
+        获取大图的文件名，只有一页时不带页码
+        Args:
+            page_id: 页码
+            page_count: 总页数
 
-    def _get_character_size(self, image_path: str) -> tuple[int, int]:
-        character_image = Image.open(image_path)
-        return character_image.size
+        Returns:
+            大图文件名
+        """
+        if page_count == 1:
+            return self.fnt_img_path.name
+        # 页码补零，保证所有大图文件名长度相同（二进制格式要求）
+        digits = len(str(page_count - 1))
+        return f"{self.name}_{page_id:0{digits}d}.png"
 
 
 def main():
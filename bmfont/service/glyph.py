@@ -0,0 +1,302 @@
+import dataclasses
+import hashlib
+import os
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+# 描述文件中的 chnl -> 图片通道，用于取出通道打包的字符
+CHNL_BANDS = {1: "B", 2: "G", 4: "R", 8: "A"}
+
+
+@dataclass(eq=False)
+class ImageRegion:
+    """
+    整张图片中的一块区域，用于从图集或精灵图中取出字符，不需要临时文件
+
+    只保存整张图片和区域，解码字符时才裁剪
+    """
+
+    image: "Image.Image"
+    # (left, top, right, bottom)
+    box: tuple[int, int, int, int]
+    # 字符所在的通道，见 CHNL_BANDS，15 表示所有通道
+    chnl: int = 15
+
+    @classmethod
+    def from_image(cls, image: "Image.Image") -> "ImageRegion":
+        """
+        整张图片作为一个区域
+        """
+        return cls(image, (0, 0, image.width, image.height))
+
+    @property
+    def size(self) -> tuple[int, int]:
+        left, top, right, bottom = self.box
+        return right - left, bottom - top
+
+    @property
+    def key(self) -> str:
+        """
+        区域的标识，同一张图片中区域和通道都相同时相同
+        """
+        return str(self.box) if self.chnl == 15 else f"{self.box}@{self.chnl}"
+
+    def crop(self) -> "Image.Image":
+        """
+        裁剪出区域内的图片，通道打包的字符取出所在的通道作为透明度，RGB 为白色
+        """
+        from PIL import Image
+
+        image = self.image.crop(self.box)
+        if self.chnl == 15:
+            return image
+        alpha = image.getchannel(CHNL_BANDS[self.chnl])
+        white = Image.new("L", image.size, 255)
+        return Image.merge("RGBA", (white, white, white, alpha))
+
+    def digest(self) -> str:
+        """
+        区域像素的哈希，相当于图片文件的内容哈希
+        """
+        image = self.crop()
+        digest = hashlib.blake2b(f"{image.mode}:{image.width}x{image.height}".encode())
+        digest.update(image.tobytes())
+        return digest.hexdigest()
+
+
+@dataclass
+class Glyph:
+    """
+    生成过程中的单个字符
+    """
+
+    value: str
+    image_path: str
+    xoffset: int = 0
+    yoffset: int = 0
+    # 原始图片的宽高
+    width: int = 0
+    height: int = 0
+    # 放进大图的区域 (left, top, right, bottom)，相对原始图片
+    box: tuple[int, int, int, int] = (0, 0, 0, 0)
+    # 解码后的 RGBA 像素，只包含 box 区域，粘贴到大图后释放
+    image: "Image.Image | None" = None
+    # 图片文件内容的哈希，没有计算时为空
+    digest: str = ""
+    # 解码后 box 区域像素的哈希，没有计算时为空
+    pixel_hash: str = ""
+    # 内存中的图片来源，不为空时不读取 image_path，image_path 只用于标识来源（例如精灵图文件）
+    region: ImageRegion | None = None
+    # 字符的前进宽度，为空时使用原始图片的宽度
+    xadvance: int | None = None
+
+    @classmethod
+    def from_character_data(cls, char_data: dict) -> "Glyph":
+        """
+        从字符数据创建
+        Args:
+            char_data: 字符数据
+
+        Returns:
+            字符
+        """
+        region = char_data.get("image")
+        if region is not None and not isinstance(region, ImageRegion):
+            # 整张图片作为一个字符
+            region = ImageRegion.from_image(region)
+        return cls(
+            value=char_data.get("value", ""),
+            image_path=char_data.get("image_path", ""),
+            xoffset=int(char_data.get("xoffset", 0)),
+            yoffset=int(char_data.get("yoffset", 0)),
+            region=region,
+            xadvance=char_data.get("xadvance"),
+        )
+
+    @property
+    def source_key(self) -> str:
+        """
+        图片来源的标识，内容相同的图片标识相同
+        """
+        if self.digest:
+            return self.digest
+        if self.region:
+            return f"{self.image_path}#{self.region.key}#{id(self.region.image)}"
+        return self.image_path
+
+    @property
+    def packed_size(self) -> tuple[int, int]:
+        """
+        放进大图的尺寸
+        """
+        left, top, right, bottom = self.box
+        return right - left, bottom - top
+
+    def probe(self) -> None:
+        """
+        只读取图片文件头获取尺寸，不解码像素
+        """
+        if self.region:
+            self.width, self.height = self.region.size
+        else:
+            from PIL import Image
+
+            with Image.open(self.image_path) as image:
+                self.width, self.height = image.size
+        self.box = (0, 0, self.width, self.height)
+
+    def load(self, trim: bool = False, hash_pixels: bool = False) -> None:
+        """
+        解码图片并转换为 RGBA，整个生成过程中每张图片只解码这一次
+        Args:
+            trim: 是否裁掉四周的透明区域
+            hash_pixels: 是否计算像素哈希，用于查找相同的图片
+        """
+        from PIL import Image
+
+        from .trim import find_alpha_bbox
+
+        if self.region:
+            rgba = self.region.crop().convert("RGBA")
+        else:
+            with Image.open(self.image_path) as image:
+                rgba = image.convert("RGBA")
+        self.width, self.height = rgba.size
+        self.box = (0, 0, self.width, self.height)
+        if trim:
+            self.box = find_alpha_bbox(rgba) or (0, 0, 0, 0)
+            if self.box != (0, 0, self.width, self.height):
+                rgba = rgba.crop(self.box)
+        self.image = rgba
+        if hash_pixels:
+            digest = hashlib.blake2b(f"{rgba.width}x{rgba.height}".encode())
+            digest.update(rgba.tobytes())
+            self.pixel_hash = digest.hexdigest()
+
+    def copy_image_from(self, other: "Glyph") -> None:
+        """
+        复用另一个相同图片的字符的处理结果
+        Args:
+            other: 已经处理过的字符
+        """
+        self.width, self.height = other.width, other.height
+        self.box = other.box
+        self.image = other.image
+        self.pixel_hash = other.pixel_hash
+
+    def release(self) -> None:
+        """
+        释放解码后的像素
+        """
+        self.image = None
+
+
+class GlyphCache:
+    """
+    解码结果缓存，在多次生成之间复用没有变化的字符图片
+
+    以图片来源为键，同时记录文件大小、修改时间和解码参数，文件保存后修改时间变化，缓存自动失效
+    """
+
+    def __init__(self):
+        # 图片来源 -> ((文件大小, 修改时间, 解码参数), 解码后的字符)
+        self._items: dict[str, tuple[tuple, Glyph]] = {}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @staticmethod
+    def _source(glyph: Glyph) -> str:
+        # 同一张精灵图中的字符用区域区分
+        return f"{glyph.image_path}#{glyph.region.key}" if glyph.region else glyph.image_path
+
+    @staticmethod
+    def _version(glyph: Glyph, options: tuple) -> tuple | None:
+        try:
+            stat = os.stat(glyph.image_path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns, options
+
+    def get(self, glyph: Glyph, options: tuple) -> Glyph | None:
+        """
+        获取缓存的解码结果
+        Args:
+            glyph: 字符
+            options: 解码参数
+
+        Returns:
+            缓存的字符，没有或已失效时为 None
+        """
+        item = self._items.get(self._source(glyph))
+        if item and item[0] == self._version(glyph, options):
+            return item[1]
+        return None
+
+    def put(self, glyph: Glyph, options: tuple) -> None:
+        """
+        缓存解码结果，同一张图片的旧结果被替换
+        Args:
+            glyph: 已经解码的字符
+            options: 解码参数
+        """
+        version = self._version(glyph, options)
+        if version:
+            # 保存副本，生成过程中释放字符的像素不影响缓存
+            self._items[self._source(glyph)] = (version, dataclasses.replace(glyph))
+
+    def clear(self) -> None:
+        self._items.clear()
+
+
+def probe_glyph(glyph: Glyph) -> Glyph:
+    """
+    读取字符图片尺寸，用于并发执行
+    """
+    glyph.probe()
+    return glyph
+
+
+def load_glyph(glyph: Glyph, trim: bool = False, hash_pixels: bool = False) -> Glyph:
+    """
+    解码字符图片，用于并发执行，参数见 Glyph.load
+    """
+    glyph.load(trim=trim, hash_pixels=hash_pixels)
+    return glyph
+
+
+def map_glyphs(
+    func: Callable[[Glyph], Glyph], glyphs: list[Glyph], workers: int = 1, use_processes: bool = False
+) -> Iterator[Glyph]:
+    """
+    并发处理字符，结果按输入顺序返回
+    Args:
+        func: 处理函数，进程池模式下必须是模块级函数
+        glyphs: 字符列表
+        workers: 并发数，小于等于 1 时在当前线程顺序执行
+        use_processes: 是否使用进程池，默认使用线程池（Pillow 解码时会释放 GIL）
+
+    Returns:
+        处理后的字符
+    """
+    if not glyphs:
+        return
+    if workers <= 1 or len(glyphs) <= 1:
+        yield from map(func, glyphs)
+        return
+
+    executor_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    workers = min(workers, len(glyphs))
+    executor = executor_cls(max_workers=workers)
+    try:
+        # 进程池按块提交，减少进程间通信的次数
+        chunksize = max(len(glyphs) // (workers * 4), 1) if use_processes else 1
+        yield from executor.map(func, glyphs, chunksize=chunksize)
+    finally:
+        # 调用方提前停止（例如取消生成）时，丢弃还没开始的任务
+        executor.shutdown(wait=True, cancel_futures=True)
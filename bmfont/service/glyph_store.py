@@ -0,0 +1,180 @@
+from dataclasses import dataclass
+from pathlib import Path
+
+from .glyph import ImageRegion
+
+
+@dataclass(slots=True)
+class GlyphEntry:
+    """
+    字符列表中的一个字符
+    """
+
+    image_path: str
+    value: str
+    xoffset: int = 0
+    yoffset: int = 0
+    width: int = 0
+    height: int = 0
+    # 内存中的图片区域（精灵图、图集中的字符），为空时读取 image_path
+    region: ImageRegion | None = None
+    # 前进宽度，为空时使用图片宽度（导入的字体保留原来的值）
+    xadvance: int | None = None
+
+    def to_character_data(self) -> dict:
+        """
+        转换为 FontGenerator 的字符数据
+        """
+        char_data = {
+            "image_path": self.image_path,
+            "value": self.value,
+            "xoffset": self.xoffset,
+            "yoffset": self.yoffset,
+        }
+        if self.region:
+            char_data["image"] = self.region
+        if self.xadvance is not None:
+            char_data["xadvance"] = self.xadvance
+        return char_data
+
+
+def guess_character(image_path: str) -> str:
+    """
+    根据文件名猜测字符：取最后一个下划线后面的部分，数字去掉前导 0
+    Args:
+        image_path: 图片路径
+
+    Returns:
+        字符
+    """
+    data = Path(image_path).stem.split("_")[-1]
+    return str(int(data)) if data.isdigit() else data
+
+
+class GlyphStore:
+    """
+    字符列表，界面表格和生成器共用
+
+    维护字符到行号的索引，按字符查找时不需要遍历整个列表
+    """
+
+    def __init__(self):
+        self.entries: list[GlyphEntry] = []
+        # 字符 -> 行号列表（升序），同一字符有多行时使用第一行
+        self._index: dict[str, list[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __getitem__(self, row: int) -> GlyphEntry:
+        return self.entries[row]
+
+    def append_images(self, paths: list[str]) -> range:
+        """
+        添加图片，只读取文件头获取尺寸
+        Args:
+            paths: 图片路径列表
+
+        Returns:
+            新增的行号范围
+        """
+        from PIL import Image
+
+        start = len(self.entries)
+        for path in paths:
+            with Image.open(path) as image:
+                width, height = image.size
+            self.append(GlyphEntry(image_path=path, value=guess_character(path), width=width, height=height))
+        return range(start, len(self.entries))
+
+    def append_character_data(self, character_data: list[dict]) -> range:
+        """
+        添加内存中的字符，例如从精灵图中切出的字符、从已有字体中导入的字符
+        Args:
+            character_data: 字符数据列表，image 为图片区域
+
+        Returns:
+            新增的行号范围
+        """
+        start = len(self.entries)
+        for char_data in character_data:
+            region: ImageRegion = char_data["image"]
+            width, height = region.size
+            self.append(
+                GlyphEntry(
+                    image_path=char_data["image_path"],
+                    value=char_data["value"],
+                    xoffset=int(char_data.get("xoffset", 0)),
+                    yoffset=int(char_data.get("yoffset", 0)),
+                    width=width,
+                    height=height,
+                    region=region,
+                    xadvance=char_data.get("xadvance"),
+                )
+            )
+        return range(start, len(self.entries))
+
+    def append(self, entry: GlyphEntry) -> None:
+        """
+        添加一个字符
+        Args:
+            entry: 字符
+        """
+        self.entries.append(entry)
+        self._index.setdefault(entry.value, []).append(len(self.entries) - 1)
+
+    def remove_rows(self, rows: list[int]) -> None:
+        """
+        删除多行
+        Args:
+            rows: 行号列表
+        """
+        removed = set(rows)
+        self.entries = [entry for row, entry in enumerate(self.entries) if row not in removed]
+        self._rebuild_index()
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self._index.clear()
+
+    def set_value(self, row: int, value: str) -> None:
+        """
+        修改字符，同时更新索引
+        Args:
+            row: 行号
+            value: 新的字符
+        """
+        entry = self.entries[row]
+        if entry.value == value:
+            return
+        rows = self._index[entry.value]
+        rows.remove(row)
+        if not rows:
+            del self._index[entry.value]
+        entry.value = value
+        rows = self._index.setdefault(value, [])
+        rows.append(row)
+        rows.sort()
+
+    def find(self, value: str) -> GlyphEntry | None:
+        """
+        按字符查找
+        Args:
+            value: 字符
+
+        Returns:
+            第一个匹配的字符，没有时返回 None
+        """
+        rows = self._index.get(value)
+        return self.entries[rows[0]] if rows else None
+
+    def to_character_data(self) -> list[dict]:
+        """
+        转换为 FontGenerator 的字符数据
+        """
+        return [entry.to_character_data() for entry in self.entries]
+
+    def _rebuild_index(self) -> None:
+        self._index.clear()
+        for row, entry in enumerate(self.entries):
+            self._index.setdefault(entry.value, []).append(row)
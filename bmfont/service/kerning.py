@@ -0,0 +1,180 @@
+import numpy as np
+
+from .descriptor import KerningInfo
+from .glyph import Glyph
+
+# 没有像素的行到边缘的距离，空白以 int16 保存，两个 EMPTY 相加也不会溢出
+EMPTY = 1 << 13
+# 间距不小于这个值时认为两个字符没有共同的行
+NO_OVERLAP = EMPTY // 2
+# 行数超过时合并相邻的行，每组取最小值（更保守），减少字符对的计算量
+MAX_BANDS = 32
+# 每次计算的字符对数量上限，控制临时数组的内存
+BLOCK_ELEMENTS = 1 << 22
+
+
+def glyph_edges(glyph: Glyph, alpha_threshold: int = 0) -> tuple[int, np.ndarray, np.ndarray] | None:
+    """
+    计算一个字符每一行左右两侧的空白，之后可以释放字符的像素
+    Args:
+        glyph: 已经解码的字符
+        alpha_threshold: 透明度大于这个值的像素算作字形
+
+    Returns:
+        (第一行的排版坐标, 左侧空白, 右侧空白)：左侧为笔位到字形最左像素的距离，
+        右侧为字形最右像素到下一个笔位（xadvance）的距离，没有像素的行为 EMPTY；字符没有像素时为 None
+    """
+    width, height = glyph.packed_size
+    if glyph.image is None or not width or not height:
+        return None
+    ink = np.asarray(glyph.image.getchannel("A")) > alpha_threshold
+    has_ink = ink.any(axis=1)
+    first = ink.argmax(axis=1)
+    last = width - 1 - ink[:, ::-1].argmax(axis=1)
+    origin = glyph.xoffset + glyph.box[0]
+    advance = glyph.width if glyph.xadvance is None else glyph.xadvance
+    left = np.where(has_ink, origin + first, EMPTY).astype(np.int16)
+    right = np.where(has_ink, advance - origin - last - 1, EMPTY).astype(np.int16)
+    return glyph.yoffset + glyph.box[1], left, right
+
+
+def edge_profiles(
+    glyphs: list[Glyph], alpha_threshold: int = 0, edges: list[tuple[int, np.ndarray, np.ndarray] | None] | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    计算每个字符每一行左右两侧的空白
+
+    行按排版坐标（yoffset + 字符图片中的行）对齐，所有字符使用相同的行范围
+    Args:
+        glyphs: 已经解码的字符
+        alpha_threshold: 透明度大于这个值的像素算作字形
+        edges: 事先用 glyph_edges 计算的每个字符的空白，不为空时字符不需要像素
+
+    Returns:
+        (左侧空白, 右侧空白)，形状都是 (字符数, 行数)，见 glyph_edges
+    """
+    if edges is None:
+        edges = [glyph_edges(glyph, alpha_threshold) for glyph in glyphs]
+    tops = [glyph.yoffset + glyph.box[1] for glyph in glyphs]
+    top = min(tops, default=0)
+    bottom = max((row + glyph.packed_size[1] for row, glyph in zip(tops, glyphs, strict=True)), default=0)
+    left = np.full((len(glyphs), max(bottom - top, 1)), EMPTY, dtype=np.int16)
+    right = left.copy()
+    for index, edge in enumerate(edges):
+        if edge is None:
+            continue
+        row, glyph_left, glyph_right = edge
+        rows = slice(row - top, row - top + len(glyph_left))
+        left[index, rows] = glyph_left
+        right[index, rows] = glyph_right
+    return _merge_bands(left), _merge_bands(right)
+
+
+def _merge_bands(profile: np.ndarray) -> np.ndarray:
+    """
+    把行合并为最多 MAX_BANDS 组，每组取最小的空白
+    """
+    rows = profile.shape[1]
+    if rows <= MAX_BANDS:
+        return profile
+    band = -(-rows // MAX_BANDS)
+    padded = np.pad(profile, ((0, 0), (0, -rows % band)), constant_values=EMPTY)
+    return padded.reshape(len(profile), -1, band).min(axis=2)
+
+
+def pair_gaps(right: np.ndarray, left: np.ndarray) -> np.ndarray:
+    """
+    计算所有字符对的最小间距：前一个字符的右侧空白加后一个字符的左侧空白，取所有行中的最小值
+    Args:
+        right: 右侧空白 (字符数, 行数)
+        left: 左侧空白 (字符数, 行数)
+
+    Returns:
+        (前一个字符, 后一个字符) 的间距，没有共同的行时为 NO_OVERLAP
+    """
+    count, rows = right.shape
+    gaps = np.empty((count, count), dtype=np.int16)
+    # 按行累加最小值，每次是一个外加（前一个字符的一列 + 后一个字符的一行），比在三维数组上求最小值快很多
+    left_rows = np.ascontiguousarray(left.T)
+    step = max(BLOCK_ELEMENTS // count, 1)
+    for start in range(0, count, step):
+        block = right[start : start + step]
+        out = gaps[start : start + step]
+        np.add.outer(block[:, 0], left_rows[0], out=out)
+        for row in range(1, rows):
+            np.minimum(out, np.add.outer(block[:, row], left_rows[row]), out=out)
+        np.clip(out, -NO_OVERLAP, NO_OVERLAP, out=out)
+    return gaps
+
+
+def compute_kernings(
+    glyphs: list[Glyph],
+    gap: int | None = None,
+    threshold: int = 1,
+    max_pairs: int = 0,
+    alpha_threshold: int = 0,
+    edges: list[tuple[int, np.ndarray, np.ndarray] | None] | None = None,
+) -> list[KerningInfo]:
+    """
+    根据字形边缘计算所有字符对的字距调整，使每对字符之间最近的距离接近目标间距
+    Args:
+        glyphs: 已经解码的字符，同一字符出现多次时使用第一个
+        gap: 目标间距，为空时使用所有字符对间距的中位数
+        threshold: 绝对值小于这个值的调整忽略，字符很多时调大可以减少字距数量
+        max_pairs: 最多保留的字距数量，超出时提高阈值，只保留调整最大的字符对，0 表示不限制
+        alpha_threshold: 透明度大于这个值的像素算作字形
+        edges: 事先用 glyph_edges 计算的每个字符的空白，与 glyphs 一一对应，不为空时字符不需要像素
+
+    Returns:
+        字距调整列表
+    """
+    firsts: dict[str, int] = {}
+    for index, glyph in enumerate(glyphs):
+        if glyph.value:
+            firsts.setdefault(glyph.value, index)
+    items = [glyphs[index] for index in firsts.values()]
+    if len(items) < 2:
+        return []
+
+    item_edges = None if edges is None else [edges[index] for index in firsts.values()]
+    left, right = edge_profiles(items, alpha_threshold, item_edges)
+    gaps = pair_gaps(right, left)
+    valid = gaps < NO_OVERLAP
+    if not valid.any():
+        return []
+    target = int(np.median(gaps[valid])) if gap is None else gap
+
+    # 最多收紧到较窄字符前进宽度的一半，避免笔画很少的字符（例如“.”）挤进相邻字符
+    advances = np.array([glyph.width if glyph.xadvance is None else glyph.xadvance for glyph in items], dtype=np.int16)
+    limit = np.minimum.outer(advances, advances) // 2
+    amounts = np.maximum(np.int16(target) - gaps, -limit)
+    amounts[~valid] = 0
+    magnitude = np.abs(amounts)
+    cutoff = _find_cutoff(magnitude, max(threshold, 1), max_pairs)
+    keep = magnitude >= cutoff
+
+    ids = [ord(glyph.value) for glyph in items]
+    firsts_index, seconds_index = np.nonzero(keep)
+    return [
+        KerningInfo(ids[first], ids[second], int(amount))
+        for first, second, amount in zip(
+            firsts_index.tolist(), seconds_index.tolist(), amounts[keep].tolist(), strict=True
+        )
+    ]
+
+
+def _find_cutoff(magnitude: np.ndarray, threshold: int, max_pairs: int) -> int:
+    """
+    查找最小的阈值，使调整的绝对值不小于阈值的字符对不超过 max_pairs 个
+    """
+    if not max_pairs or np.count_nonzero(magnitude >= threshold) <= max_pairs:
+        return threshold
+    # 数量随阈值单调减少，二分查找
+    low, high = threshold + 1, int(magnitude.max()) + 1
+    while low < high:
+        middle = (low + high) // 2
+        if np.count_nonzero(magnitude >= middle) <= max_pairs:
+            high = middle
+        else:
+            low = middle + 1
+    return low
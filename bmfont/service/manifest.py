@@ -0,0 +1,217 @@
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .fnt_import import ImportedFont
+    from .font_generator import FontGenerator
+
+
+class ManifestError(ValueError):
+    """
+    清单文件格式错误
+    """
+
+
+@dataclass
+class FontManifest:
+    """
+    一个字体的构建清单
+
+    清单文件为 JSON，可以是单个字体对象、字体对象数组，或者带 fonts 数组的对象：
+
+        {
+            "name": "wz_tw",
+            "output": "../assets/images",
+            "glyphs": [{"image": "wz_tip_0.png", "value": "0", "xoffset": 0, "yoffset": 0}],
+            "options": {"packer": "maxrects", "trim": true}
+        }
+
+    glyphs 也可以换成 images + characters 的写法，按顺序一一对应：
+
+        {"name": "num", "output": "out", "images": ["0.png", "1.png"], "characters": "01"}
+
+    或者 sheet + characters，从一张横条或网格精灵图中按顺序切出字符，min_gap 为字符之间至少间隔的透明列数：
+
+        {"name": "num", "output": "out", "sheet": "digits.png", "characters": "0123456789", "min_gap": 1}
+
+    或者 fnt，导入已有的 BMFont 字体（文本或二进制格式）重新打包，保持原来的行高和基线：
+
+        {"name": "num", "output": "out", "fnt": "legacy/num.fnt", "options": {"encoding": "max"}}
+
+    多个单色字体可以用 channels 放进同一张大图的不同通道，每个字体的写法同上，name 为描述文件名：
+
+        {"name": "ui_fonts", "output": "out", "channels": [{"name": "num", "images": [...], "characters": "01"}]}
+
+    相对路径都相对于清单文件所在的目录。options 为 FontGenerator 的参数。
+    """
+
+    name: str
+    output_folder: str
+    character_data: list[dict]
+    options: dict = field(default_factory=dict)
+    # 通道打包的字体：字体名称 -> 字符数据列表，不为空时忽略 character_data
+    channels: dict[str, list[dict]] = field(default_factory=dict)
+    # 清单文件路径，用于日志
+    source: str = ""
+
+    def create_generator(self, **overrides) -> "FontGenerator":
+        """
+        创建字体生成器
+        Args:
+            overrides: 覆盖清单中的生成参数
+
+        Returns:
+            字体生成器
+        """
+        options = {**self.options, **overrides}
+        if self.channels:
+            from .channel_pack import ChannelPackedGenerator
+
+            return ChannelPackedGenerator(
+                fonts=self.channels, output_folder=self.output_folder, name=self.name, **options
+            )
+        from .font_generator import FontGenerator
+
+        return FontGenerator(
+            character_data=self.character_data, output_folder=self.output_folder, name=self.name, **options
+        )
+
+
+def load_manifests(path: str | Path) -> list[FontManifest]:
+    """
+    读取清单文件
+    Args:
+        path: 清单文件路径
+
+    Returns:
+        清单中的所有字体
+    """
+    path = Path(path)
+    try:
+        data = json.loads(path.read_text(encoding="utf8"))
+    except (OSError, json.JSONDecodeError) as e:
+        raise ManifestError(f"{path}: 无法读取清单文件：{e}") from e
+
+    if isinstance(data, dict) and "fonts" in data:
+        data = data["fonts"]
+    if isinstance(data, dict):
+        data = [data]
+    if not isinstance(data, list):
+        raise ManifestError(f"{path}: 清单内容必须是对象或数组")
+
+    return [_parse_font(path, index, font) for index, font in enumerate(data)]
+
+
+def _parse_font(path: Path, index: int, font: dict) -> FontManifest:
+    """
+    解析清单中的一个字体
+    """
+    where = f"{path}[{index}]"
+    if not isinstance(font, dict):
+        raise ManifestError(f"{where}: 字体配置必须是对象")
+
+    # 相对路径按清单所在的目录解析为绝对路径，描述文件中大图的路径和构建缓存的键与当前目录无关
+    base = path.resolve().parent
+    name = font.get("name")
+    if not name:
+        raise ManifestError(f"{where}: 缺少 name")
+    options = dict(font.get("options", {}))
+
+    if "channels" in font:
+        fonts = font["channels"]
+        if not isinstance(fonts, list):
+            raise ManifestError(f"{where}: channels 必须是数组")
+        channels = {}
+        for channel_index, channel_font in enumerate(fonts):
+            channel_where = f"{where}.channels[{channel_index}]"
+            if not isinstance(channel_font, dict) or not channel_font.get("name"):
+                raise ManifestError(f"{channel_where}: 缺少 name")
+            channels[channel_font["name"]] = _parse_glyphs(channel_where, base, channel_font)
+        character_data = []
+    elif "fnt" in font:
+        channels = {}
+        imported = _load_fnt(where, base / font["fnt"])
+        character_data = imported.character_data
+        options = {**imported.options, **options}
+    else:
+        channels = {}
+        character_data = _parse_glyphs(where, base, font)
+
+    return FontManifest(
+        name=name,
+        output_folder=str(base / font.get("output", ".")),
+        character_data=character_data,
+        options=options,
+        channels=channels,
+        source=where,
+    )
+
+
+def _parse_glyphs(where: str, base: Path, font: dict) -> list[dict]:
+    """
+    解析字体的字符配置
+    Args:
+        where: 字体在清单中的位置，用于错误信息
+        base: 相对路径的基准目录
+        font: 字体配置
+
+    Returns:
+        字符数据列表
+    """
+    if "sheet" in font:
+        if "characters" not in font:
+            raise ManifestError(f"{where}: sheet 需要 characters")
+        from .sheet import load_sheet
+
+        try:
+            return load_sheet(
+                base / font["sheet"],
+                font["characters"],
+                threshold=int(font.get("threshold", 0)),
+                min_gap=int(font.get("min_gap", 1)),
+            )
+        except (OSError, ValueError) as e:
+            raise ManifestError(f"{where}: {e}") from e
+
+    if "fnt" in font:
+        return _load_fnt(where, base / font["fnt"]).character_data
+
+    if "glyphs" in font:
+        glyphs = font["glyphs"]
+    elif "images" in font and "characters" in font:
+        images, characters = font["images"], font["characters"]
+        if len(images) != len(characters):
+            raise ManifestError(f"{where}: images 有 {len(images)} 个，characters 有 {len(characters)} 个")
+        glyphs = [{"image": image, "value": value} for image, value in zip(images, characters, strict=True)]
+    else:
+        raise ManifestError(f"{where}: 缺少 glyphs、images + characters、sheet + characters 或 fnt")
+
+    character_data = []
+    for glyph in glyphs:
+        image = glyph.get("image") or glyph.get("image_path")
+        value = glyph.get("value", "")
+        if not image or len(value) != 1:
+            raise ManifestError(f"{where}: 字符配置不正确：{glyph}")
+        character_data.append(
+            {
+                "image_path": str(base / image),
+                "value": value,
+                "xoffset": int(glyph.get("xoffset", 0)),
+                "yoffset": int(glyph.get("yoffset", 0)),
+            }
+        )
+    return character_data
+
+
+def _load_fnt(where: str, path: Path) -> "ImportedFont":
+    """
+    导入已有的字体，错误转换为清单错误
+    """
+    from .fnt_import import load_fnt
+
+    try:
+        return load_fnt(path)
+    except (OSError, ValueError) as e:
+        raise ManifestError(f"{where}: 无法导入 {path}：{e}") from e
@@ -0,0 +1,209 @@
+import io
+import os
+import uuid
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO
+
+
+class CountingWriter:
+    """
+    记录写入的字节数
+
+    不提供 fileno，Pillow 只能通过 write 写入，写入的字节都会被统计
+    """
+
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+        self.count = 0
+
+    def write(self, data) -> int:
+        self.stream.write(data)
+        size = memoryview(data).nbytes
+        self.count += size
+        return size
+
+    def tell(self) -> int:
+        return self.count
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+
+class FontOutput(ABC):
+    """
+    生成结果（大图和描述文件）的写入目标
+
+    生成器按文件名逐个打开输出流写入，全部写完后调用 commit，失败或取消时调用 discard。
+    """
+
+    def __init__(self):
+        # 文件名 -> 写入的字节数，按写入的顺序
+        self.sizes: dict[str, int] = {}
+
+    def location(self, name: str) -> str:
+        """
+        描述文件中引用大图的写法
+        Args:
+            name: 大图文件名
+
+        Returns:
+            写入描述文件 pages 中的路径
+        """
+        return name
+
+    @contextmanager
+    def open(self, name: str) -> Iterator[CountingWriter]:
+        """
+        打开一个输出文件
+        Args:
+            name: 文件名
+
+        Returns:
+            可以写入的二进制流，退出时关闭
+        """
+        stream = self._open(name)
+        writer = CountingWriter(stream)
+        try:
+            yield writer
+        finally:
+            self._close(name, stream)
+        self.sizes[name] = writer.count
+
+    def write(self, name: str, data: bytes) -> None:
+        """
+        写入一个完整的输出文件
+        """
+        with self.open(name) as stream:
+            stream.write(data)
+
+    @abstractmethod
+    def _open(self, name: str) -> BinaryIO:
+        pass
+
+    def _close(self, name: str, stream: BinaryIO) -> None:
+        stream.close()
+
+    @abstractmethod
+    def commit(self) -> None:
+        """
+        所有文件都已写完
+        """
+
+    def discard(self) -> None:
+        """
+        生成失败或取消，丢弃已经写入的内容
+        """
+        self.sizes.clear()
+
+
+class FolderOutput(FontOutput):
+    """
+    写入输出目录
+
+    每个文件先写入同一目录下的临时文件，全部写完后再逐个重命名覆盖旧文件（先大图后描述文件），
+    生成失败、取消或进程中途退出时旧的大图和描述文件都保持不变，不会出现缺失或不匹配的文件。
+    """
+
+    def __init__(self, folder: str | Path):
+        super().__init__()
+        self.folder = Path(folder)
+        # 文件名 -> 临时文件路径
+        self._temp_paths: dict[str, Path] = {}
+
+    def location(self, name: str) -> str:
+        return str(self.folder / name)
+
+    @property
+    def paths(self) -> list[Path]:
+        """
+        已经写入的文件路径
+        """
+        return [self.folder / name for name in self.sizes]
+
+    def _open(self, name: str) -> BinaryIO:
+        self.folder.mkdir(parents=True, exist_ok=True)
+        # 临时文件以 . 开头，不会被当作字体资源；同一目录保证重命名是原子的
+        temp_path = self.folder / f".{name}.{uuid.uuid4().hex[:8]}.tmp"
+        self._temp_paths[name] = temp_path
+        return open(temp_path, "xb")
+
+    def _close(self, name: str, stream: BinaryIO) -> None:
+        try:
+            stream.flush()
+            # 写入磁盘后再重命名，断电时也不会得到内容不完整的文件
+            os.fsync(stream.fileno())
+        finally:
+            stream.close()
+
+    def commit(self) -> None:
+        for name, temp_path in self._temp_paths.items():
+            os.replace(temp_path, self.folder / name)
+        self._temp_paths.clear()
+
+    def discard(self) -> None:
+        for temp_path in self._temp_paths.values():
+            temp_path.unlink(missing_ok=True)
+        self._temp_paths.clear()
+        super().discard()
+
+
+class MemoryOutput(FontOutput):
+    """
+    写入内存，不访问磁盘，描述文件中的大图只有文件名
+    """
+
+    def __init__(self):
+        super().__init__()
+        # 文件名 -> 文件内容
+        self.files: dict[str, bytes] = {}
+        # 文件名 -> 正在写入的缓冲
+        self._buffers: dict[str, io.BytesIO] = {}
+
+    def _open(self, name: str) -> BinaryIO:
+        buffer = self._buffers[name] = io.BytesIO()
+        return buffer
+
+    def _close(self, name: str, stream: BinaryIO) -> None:
+        buffer = self._buffers.pop(name)
+        self.files[name] = buffer.getvalue()
+        buffer.close()
+
+    def commit(self) -> None:
+        # 内容在关闭时已经保存到 files 中
+        pass
+
+    def discard(self) -> None:
+        self.files.clear()
+        super().discard()
+
+
+class StreamOutput(FontOutput):
+    """
+    写入调用方提供的二进制流，例如网络连接或压缩包中的文件，描述文件中的大图只有文件名
+    """
+
+    def __init__(self, open_stream: Callable[[str], BinaryIO], close_streams: bool = False):
+        """
+        Args:
+            open_stream: 按文件名返回可以写入的二进制流
+            close_streams: 写完后是否关闭流，默认由调用方关闭
+        """
+        super().__init__()
+        self.open_stream = open_stream
+        self.close_streams = close_streams
+
+    def _open(self, name: str) -> BinaryIO:
+        return self.open_stream(name)
+
+    def _close(self, name: str, stream: BinaryIO) -> None:
+        if self.close_streams:
+            stream.close()
+        else:
+            stream.flush()
+
+    def commit(self) -> None:
+        # 写入的内容已经交给调用方的流
+        pass
@@ -0,0 +1,495 @@
+import math
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+
+@dataclass
+class PackResult:
+    """
+    装箱结果
+    """
+
+    # 大图的宽高
+    width: int
+    height: int
+    # 放在这一页的矩形在输入中的下标
+    indices: list[int] = field(default_factory=list)
+    # 每个矩形左上角的坐标，顺序与 indices 一致
+    positions: list[tuple[int, int]] = field(default_factory=list)
+    # 所有矩形的面积之和（不含间距）
+    used_area: int = 0
+
+    @property
+    def efficiency(self) -> float:
+        """
+        装箱效率：矩形总面积 / 大图面积
+        """
+        area = self.width * self.height
+        return self.used_area / area if area else 0.0
+
+
+class Packer(ABC):
+    """
+    矩形装箱器基类，在固定大小的箱子里逐个放入矩形
+    """
+
+    name: str = ""
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+
+    @abstractmethod
+    def insert(self, width: int, height: int) -> tuple[int, int] | None:
+        """
+        放入一个矩形
+        Args:
+            width: 矩形宽度
+            height: 矩形高度
+
+        Returns:
+            放置的左上角坐标，放不下时返回 None
+        """
+
+
+class MaxRectsPacker(Packer):
+    """
+    MaxRects 装箱算法，使用最短边适配（Best Short Side Fit）规则
+    """
+
+    name = "maxrects"
+
+    def __init__(self, width: int, height: int):
+        super().__init__(width, height)
+        # 空闲矩形列表 (x, y, w, h)
+        self.free_rects: list[tuple[int, int, int, int]] = [(0, 0, width, height)]
+
+    def insert(self, width: int, height: int) -> tuple[int, int] | None:
+        best: tuple[int, int] | None = None
+        best_short, best_long = math.inf, math.inf
+        for fx, fy, fw, fh in self.free_rects:
+            if fw < width or fh < height:
+                continue
+            leftover_w, leftover_h = fw - width, fh - height
+            short_side, long_side = min(leftover_w, leftover_h), max(leftover_w, leftover_h)
+            if short_side < best_short or (short_side == best_short and long_side < best_long):
+                best, best_short, best_long = (fx, fy), short_side, long_side
+
+        if best is None:
+            return None
+
+        self._place(best[0], best[1], width, height)
+        return best
+
+    def _place(self, x: int, y: int, width: int, height: int) -> None:
+        """
+        放置矩形后切分所有与之相交的空闲矩形
+        """
+        right, bottom = x + width, y + height
+        kept_rects, split_rects = [], []
+        for rect in self.free_rects:
+            fx, fy, fw, fh = rect
+            if x >= fx + fw or right <= fx or y >= fy + fh or bottom <= fy:
+                kept_rects.append(rect)
+                continue
+            if x > fx:
+                split_rects.append((fx, fy, x - fx, fh))
+            if right < fx + fw:
+                split_rects.append((right, fy, fx + fw - right, fh))
+            if y > fy:
+                split_rects.append((fx, fy, fw, y - fy))
+            if bottom < fy + fh:
+                split_rects.append((fx, bottom, fw, fy + fh - bottom))
+        # 新切分的矩形都紧贴放置的矩形，能包含它们的未切分矩形也必须紧贴放置的矩形，只需要和这些矩形比较
+        touching_rects = [
+            (fx, fy, fw, fh)
+            for fx, fy, fw, fh in kept_rects
+            if fx <= right and x <= fx + fw and fy <= bottom and y <= fy + fh
+        ]
+        self.free_rects = kept_rects + self._prune(split_rects, touching_rects)
+
+    @staticmethod
+    def _prune(
+        split_rects: list[tuple[int, int, int, int]], kept_rects: list[tuple[int, int, int, int]]
+    ) -> list[tuple[int, int, int, int]]:
+        """
+        删除被其他空闲矩形完全包含的新切分矩形
+
+        未被切分的空闲矩形之间已经互不包含，且不可能被新切分出的矩形包含，只需检查新矩形
+        Args:
+            split_rects: 新切分的矩形
+            kept_rects: 可能包含新矩形的未切分矩形
+        """
+        # 按面积从大到小排序，新矩形之间只需检查是否被前面的矩形包含
+        split_rects = sorted(set(split_rects), key=lambda r: r[2] * r[3], reverse=True)
+        result: list[tuple[int, int, int, int]] = []
+        for rect in split_rects:
+            x, y, w, h = rect
+            right, bottom = x + w, y + h
+            contained = any(
+                x >= kx and y >= ky and right <= kx + kw and bottom <= ky + kh
+                for kx, ky, kw, kh in (*result, *kept_rects)
+            )
+            if not contained:
+                result.append(rect)
+        return result
+
+
+class SkylinePacker(Packer):
+    """
+    Skyline 装箱算法，使用最低水平线（Bottom Left）规则
+    """
+
+    name = "skyline"
+
+    def __init__(self, width: int, height: int):
+        super().__init__(width, height)
+        # 天际线节点列表 (x, y, w)
+        self.skyline: list[tuple[int, int, int]] = [(0, 0, width)]
+
+    def insert(self, width: int, height: int) -> tuple[int, int] | None:
+        best_index = -1
+        best_x, best_y = 0, 0
+        best_bottom, best_width = math.inf, math.inf
+        for index, (node_x, _node_y, node_w) in enumerate(self.skyline):
+            y = self._fit(index, width, height)
+            if y is None:
+                continue
+            bottom = y + height
+            if bottom < best_bottom or (bottom == best_bottom and node_w < best_width):
+                best_index, best_x, best_y = index, node_x, y
+                best_bottom, best_width = bottom, node_w
+
+        if best_index < 0:
+            return None
+
+        self._add_level(best_index, best_x, best_y, width, height)
+        return best_x, best_y
+
+    def _fit(self, index: int, width: int, height: int) -> int | None:
+        """
+        计算从第 index 个节点开始放置矩形时的 y 坐标，放不下返回 None
+        """
+        x = self.skyline[index][0]
+        if x + width > self.width:
+            return None
+        remaining = width
+        y = 0
+        while remaining > 0:
+            _node_x, node_y, node_w = self.skyline[index]
+            y = max(y, node_y)
+            if y + height > self.height:
+                return None
+            remaining -= node_w
+            index += 1
+        return y
+
+    def _add_level(self, index: int, x: int, y: int, width: int, height: int) -> None:
+        """
+        放置矩形后更新天际线
+        """
+        self.skyline.insert(index, (x, y + height, width))
+        right = x + width
+        i = index + 1
+        while i < len(self.skyline):
+            node_x, node_y, node_w = self.skyline[i]
+            if node_x >= right:
+                break
+            shrink = right - node_x
+            if node_w <= shrink:
+                del self.skyline[i]
+                continue
+            self.skyline[i] = (right, node_y, node_w - shrink)
+            break
+
+        # 合并高度相同的相邻节点
+        merged: list[tuple[int, int, int]] = []
+        for node in self.skyline:
+            if merged and merged[-1][1] == node[1]:
+                last = merged[-1]
+                merged[-1] = (last[0], last[1], last[2] + node[2])
+            else:
+                merged.append(node)
+        self.skyline = merged
+
+
+PACKERS: dict[str, type[Packer]] = {
+    MaxRectsPacker.name: MaxRectsPacker,
+    SkylinePacker.name: SkylinePacker,
+}
+
+
+# 不限制大图尺寸时使用的最大尺寸
+UNLIMITED_SIZE = 1 << 30
+# 查找大图高度时，上下限相差不超过这个比例就停止，减少装箱的次数
+HEIGHT_TOLERANCE = 0.02
+# 每放入这么多个矩形检查一次是否需要中断装箱
+CHECK_INTERVAL = 256
+
+
+def next_power_of_two(value: int) -> int:
+    """
+    大于等于 value 的最小 2 的幂
+    """
+    return 1 << max(value - 1, 0).bit_length()
+
+
+class AtlasPacker:
+    """
+    大图布局器：根据矩形尺寸自动寻找面积尽量小的大图尺寸，超出最大尺寸时分成多页
+    """
+
+    def __init__(
+        self,
+        algorithm: str = "maxrects",
+        spacing: int = 1,
+        power_of_two: bool = False,
+        square: bool = False,
+        max_width: int = 0,
+        max_height: int = 0,
+    ):
+        """
+        Args:
+            algorithm: 装箱算法，见 PACKERS
+            spacing: 矩形之间的间距
+            power_of_two: 大图宽高是否必须为 2 的幂
+            square: 大图是否必须为正方形
+            max_width: 每页大图的最大宽度，0 表示不限制
+            max_height: 每页大图的最大高度，0 表示不限制
+        """
+        if algorithm not in PACKERS:
+            raise ValueError(f"不支持的装箱算法：{algorithm}，可选：{', '.join(PACKERS)}")
+        self.packer_cls = PACKERS[algorithm]
+        self.spacing = max(spacing, 0)
+        self.power_of_two = power_of_two
+        self.square = square
+        self.max_width = max_width if max_width > 0 else UNLIMITED_SIZE
+        self.max_height = max_height if max_height > 0 else UNLIMITED_SIZE
+        if power_of_two:
+            # 最大尺寸向下取到 2 的幂
+            self.max_width = 1 << (self.max_width.bit_length() - 1)
+            self.max_height = 1 << (self.max_height.bit_length() - 1)
+        if square:
+            self.max_width = self.max_height = min(self.max_width, self.max_height)
+
+    def pack(self, sizes: list[tuple[int, int]], check: Callable[[], None] | None = None) -> list[PackResult]:
+        """
+        对一组矩形进行装箱
+        Args:
+            sizes: 每个矩形的 (宽, 高)
+            check: 装箱过程中定期调用，可以抛出异常中断装箱（例如取消生成）
+
+        Returns:
+            每一页的装箱结果；宽或高为 0 的矩形不参与装箱，放在第一页的 (0, 0)
+        """
+        for w, h in sizes:
+            if w > self.max_width or h > self.max_height:
+                raise ValueError(f"图片尺寸 {w}x{h} 超过了大图的最大尺寸 {self.max_width}x{self.max_height}")
+        check = check or _no_check
+
+        pages: list[PackResult] = []
+        remaining = [index for index, (w, h) in enumerate(sizes) if w and h]
+        empty = [index for index, (w, h) in enumerate(sizes) if not w or not h]
+        while remaining:
+            page = self._pack_page([sizes[i] for i in remaining], check)
+            if page is not None:
+                page.indices = remaining
+                pages.append(page)
+                break
+
+            # 一页放不下，先按最大尺寸尽量填满一页，剩下的放到后面的页
+            placed = self._fill_page([sizes[i] for i in remaining], check)
+            page_indices = [remaining[i] for i in placed]
+            page_sizes = [sizes[i] for i in page_indices]
+            page = self._pack_page(page_sizes, check) or self._fill_page_result(page_sizes, check)
+            page.indices = page_indices
+            pages.append(page)
+            placed_set = set(placed)
+            remaining = [index for i, index in enumerate(remaining) if i not in placed_set]
+
+        if empty:
+            # 空白的矩形不占用大图，全部是空白时使用 1x1 的大图
+            if not pages:
+                pages.append(PackResult(width=1, height=1))
+            pages[0].indices = [*pages[0].indices, *empty]
+            pages[0].positions = [*pages[0].positions, *[(0, 0)] * len(empty)]
+        return pages
+
+    def _pack_page(self, sizes: list[tuple[int, int]], check: Callable[[], None]) -> PackResult | None:
+        """
+        把全部矩形放进一页，寻找面积尽量小的大图尺寸，超出最大尺寸时返回 None
+
+        宽度按面积估算一次（2 的幂时只尝试估算值附近的几个宽度），高度从面积下限开始按比例增加，
+        找到放得下的高度后再二分查找，每个宽度只需要装箱几次
+        """
+        used_area = sum(w * h for w, h in sizes)
+        max_w = max(w for w, _ in sizes)
+        max_h = max(h for _, h in sizes)
+        # 按间距放大后的面积，作为大图面积的下限
+        spaced_area = sum((w + self.spacing) * (h + self.spacing) for w, h in sizes)
+        if spaced_area > (self.max_width + self.spacing) * (self.max_height + self.spacing):
+            return None
+
+        best: PackResult | None = None
+        for width in self._candidate_widths(max_w, max_h, spaced_area):
+            found = self._find_height(sizes, width, max(max_h, math.ceil(spaced_area / width), 1), check)
+            if found is None:
+                continue
+            width, height, positions = found
+            result = self._shrink(sizes, positions, width, height)
+            result.used_area = used_area
+            if best is None or self._sort_key(result) < self._sort_key(best):
+                best = result
+
+        return best
+
+    def _find_height(
+        self, sizes: list[tuple[int, int]], width: int, min_height: int, check: Callable[[], None]
+    ) -> tuple[int, int, list[tuple[int, int]]] | None:
+        """
+        查找放得下全部矩形的最小高度（正方形时宽度随高度变化）
+        Args:
+            sizes: 矩形尺寸
+            width: 大图宽度
+            min_height: 高度的下限
+            check: 见 pack
+
+        Returns:
+            (宽, 高, 每个矩形的位置)，最大尺寸也放不下时为 None
+        """
+
+        def attempt(height: int) -> tuple[int, int, list[tuple[int, int]]] | None:
+            page_width = height if self.square else width
+            if page_width > self.max_width or height > self.max_height:
+                return None
+            positions = self._try_pack(sizes, page_width, height, check)
+            return None if positions is None else (page_width, height, positions)
+
+        height = self._round(max(min_height, width) if self.square else min_height)
+        found = attempt(height)
+        # 按比例增加高度，直到放得下或者超出最大尺寸
+        failed = height
+        step = max(height // 20, 1)
+        while found is None:
+            if height >= self.max_height:
+                return None
+            height = min(self._round(height + step) if not self.power_of_two else height * 2, self.max_height)
+            if self.square:
+                height = min(height, self.max_width)
+            found = attempt(height)
+            if found is None:
+                failed = height
+                step *= 2
+        if self.power_of_two:
+            return found
+
+        # 在放不下和放得下的高度之间二分查找
+        low, high = failed, found[1]
+        while high - low > max(int(high * HEIGHT_TOLERANCE), 1):
+            middle = (low + high) // 2
+            result = attempt(middle)
+            if result is None:
+                low = middle
+            else:
+                high, found = middle, result
+        return found
+
+    def _fill_page(self, sizes: list[tuple[int, int]], check: Callable[[], None]) -> list[int]:
+        """
+        按最大尺寸尽量多地放入矩形
+
+        Returns:
+            放进这一页的矩形下标
+        """
+        packer = self.packer_cls(self.max_width + self.spacing, self.max_height + self.spacing)
+        placed = []
+        for count, index in enumerate(self._order(sizes)):
+            if count % CHECK_INTERVAL == 0:
+                check()
+            w, h = sizes[index]
+            if packer.insert(w + self.spacing, h + self.spacing) is not None:
+                placed.append(index)
+        return sorted(placed)
+
+    def _fill_page_result(self, sizes: list[tuple[int, int]], check: Callable[[], None]) -> PackResult:
+        """
+        按最大尺寸放置一页矩形，用在无法找到更小尺寸的时候
+        """
+        width, height = self.max_width, self.max_height
+        positions = self._try_pack(sizes, width, height, check)
+        assert positions is not None
+        result = self._shrink(sizes, positions, width, height)
+        result.used_area = sum(w * h for w, h in sizes)
+        return result
+
+    def _candidate_widths(self, max_w: int, max_h: int, area: int) -> list[int]:
+        """
+        生成候选的大图宽度
+        """
+        side = max(math.ceil(math.sqrt(area)), 1)
+        if self.square:
+            return [min(self._round(max(max_w, max_h, side)), self.max_width)]
+        if self.power_of_two:
+            # 估算的边长前后各一个 2 的幂，避免很窄很高的大图
+            start = max(next_power_of_two(max_w), next_power_of_two(side) // 2)
+            end = min(max(start, next_power_of_two(side) * 2), self.max_width)
+            widths = []
+            width = start
+            while width <= end:
+                widths.append(width)
+                width *= 2
+            return widths or [self.max_width]
+        return [min(max(max_w, side), self.max_width)]
+
+    def _try_pack(
+        self, sizes: list[tuple[int, int]], width: int, height: int, check: Callable[[], None]
+    ) -> list[tuple[int, int]] | None:
+        """
+        尝试在固定大小的箱子中放入全部矩形
+        """
+        # 箱子额外加上一个间距，保证最右和最下的矩形不需要留白
+        packer = self.packer_cls(width + self.spacing, height + self.spacing)
+        positions: list[tuple[int, int]] = [(0, 0)] * len(sizes)
+        for count, index in enumerate(self._order(sizes)):
+            if count % CHECK_INTERVAL == 0:
+                check()
+            w, h = sizes[index]
+            position = packer.insert(w + self.spacing, h + self.spacing)
+            if position is None:
+                return None
+            positions[index] = position
+        return positions
+
+    @staticmethod
+    def _order(sizes: list[tuple[int, int]]) -> list[int]:
+        """
+        放入矩形的顺序，先放大的矩形，装箱效果更好
+        """
+        return sorted(range(len(sizes)), key=lambda i: (max(sizes[i]), sizes[i][0] * sizes[i][1]), reverse=True)
+
+    def _shrink(self, sizes: list[tuple[int, int]], positions: list[tuple[int, int]], width: int, height: int):
+        """
+        把大图尺寸收缩到实际使用的范围
+        """
+        used_w = max(x + w for (x, _), (w, _h) in zip(positions, sizes, strict=True))
+        used_h = max(y + h for (_, y), (_w, h) in zip(positions, sizes, strict=True))
+        if self.power_of_two:
+            used_w, used_h = next_power_of_two(used_w), next_power_of_two(used_h)
+        if self.square:
+            used_w = used_h = max(used_w, used_h)
+        return PackResult(width=min(width, used_w), height=min(height, used_h), positions=positions)
+
+    @staticmethod
+    def _sort_key(result: PackResult) -> tuple[int, int]:
+        """
+        面积越小越好，面积相同时优先接近正方形
+        """
+        return result.width * result.height, max(result.width, result.height)
+
+    def _round(self, value: int) -> int:
+        return next_power_of_two(value) if self.power_of_two else value
+
+
+def _no_check() -> None:
+    pass
@@ -0,0 +1,193 @@
+import json
+import sys
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from loguru import logger
+
+# 生成的各个阶段
+STAGES = {
+    "hash": "检查缓存",
+    "load": "读取图片",
+    "kerning": "计算字距",
+    "pack": "计算布局",
+    "composite": "合成大图",
+    # 只用于统计耗时，不报告进度
+    "encode": "编码大图",
+    "write": "保存描述文件",
+}
+
+
+def peak_rss() -> int:
+    """
+    当前进程的峰值内存（整个进程运行期间），单位字节，无法获取时为 0
+    """
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD),
+                ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return 0
+        return counters.PeakWorkingSetSize
+
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+@dataclass
+class StageStats:
+    """
+    一个阶段的统计
+    """
+
+    seconds: float = 0.0
+    # 处理的数量，例如字符数、页数、文件数
+    count: int = 0
+    # 处理的字节数，例如解码后的像素、写入的文件
+    bytes: int = 0
+
+
+@dataclass
+class GenerationResult:
+    """
+    一次生成的结果和统计
+    """
+
+    name: str
+    # 输入没有变化，跳过了生成
+    skipped: bool = False
+    seconds: float = 0.0
+    stages: dict[str, StageStats] = field(default_factory=dict)
+    glyphs: int = 0
+    # 放进大图的字符数量，相同图片的字符只算一次
+    packed_glyphs: int = 0
+    pages: int = 0
+    width: int = 0
+    height: int = 0
+    # 所有输出文件的大小
+    output_bytes: int = 0
+    outputs: list[str] = field(default_factory=list)
+    peak_rss: int = 0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    def summary(self) -> str:
+        """
+        一行耗时摘要
+        """
+        if self.skipped:
+            return f"输入没有变化，跳过生成，耗时 {self.seconds:.2f}s"
+        stages = "，".join(
+            f"{STAGES.get(stage, stage)} {stats.seconds:.2f}s" for stage, stats in self.stages.items() if stats.seconds
+        )
+        return f"共耗时 {self.seconds:.2f}s：{stages}"
+
+    def log(self) -> None:
+        """
+        输出各阶段的统计
+        """
+        logger.info(f"{self.name}：{self.summary()}")
+        for stage, stats in self.stages.items():
+            share = stats.seconds / self.seconds if self.seconds else 0
+            logger.info(
+                f"  {STAGES.get(stage, stage)}：{stats.seconds * 1000:.1f} ms（{share:.1%}），"
+                f"数量 {stats.count}，{stats.bytes / 1024:.1f} KB"
+            )
+        logger.info(
+            f"  字符 {self.glyphs} 个（放进大图 {self.packed_glyphs} 个），大图 {self.pages} 页 {self.width}x{self.height}，"
+            f"输出 {self.output_bytes / 1024:.1f} KB，峰值内存 {self.peak_rss / 1024 / 1024:.1f} MB"
+        )
+
+    def save(self, path: str | Path) -> None:
+        """
+        保存为 JSON 报告
+        Args:
+            path: 报告路径
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), ensure_ascii=False, indent=2), encoding="utf8")
+
+
+class Profiler:
+    """
+    按阶段统计耗时和数量
+
+    阶段可以嵌套，嵌套时外层阶段暂停计时，每段时间只计入最内层的阶段
+    """
+
+    def __init__(self):
+        self.stages: dict[str, StageStats] = {}
+        self._stack: list[str] = []
+        self._mark = 0.0
+        self._start = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageStats]:
+        """
+        统计一个阶段的耗时
+        Args:
+            name: 阶段名称
+
+        Returns:
+            阶段的统计，可以在阶段内累加数量
+        """
+        stats = self.stages.setdefault(name, StageStats())
+        self._switch()
+        self._stack.append(name)
+        try:
+            yield stats
+        finally:
+            self._switch()
+            self._stack.pop()
+
+    def add(self, name: str, count: int = 0, nbytes: int = 0) -> None:
+        """
+        累加阶段的数量
+        Args:
+            name: 阶段名称
+            count: 数量
+            nbytes: 字节数
+        """
+        stats = self.stages.setdefault(name, StageStats())
+        stats.count += count
+        stats.bytes += nbytes
+
+    def _switch(self) -> None:
+        """
+        把上次切换以来的时间计入当前阶段
+        """
+        now = time.perf_counter()
+        if self._stack:
+            self.stages[self._stack[-1]].seconds += now - self._mark
+        self._mark = now
@@ -0,0 +1,94 @@
+import numpy as np
+from PIL import Image
+
+from .glyph import Glyph, load_glyph
+
+# 透明度不小于这个值的像素算作字形内部
+INSIDE_THRESHOLD = 128
+
+
+def _row_distance(mask: np.ndarray) -> np.ndarray:
+    """
+    每个像素到同一行中最近的 True 像素的距离，没有时为无穷大
+    """
+    index = np.arange(mask.shape[1], dtype=np.float32)
+    before = np.maximum.accumulate(np.where(mask, index, -np.inf), axis=1)
+    after = np.minimum.accumulate(np.where(mask, index, np.inf)[:, ::-1], axis=1)[:, ::-1]
+    return np.minimum(index - before, after - index)
+
+
+def _distance_to(mask: np.ndarray, spread: int) -> np.ndarray:
+    """
+    每个像素到最近的 True 像素的欧氏距离
+
+    先按行求距离，再在列方向上合并 [-spread, spread] 范围内的行。
+    距离不超过 spread 时结果是精确的，超过时只保证不小于 spread，后面会被截断。
+    """
+    height = mask.shape[0]
+    row_squared = _row_distance(mask) ** 2
+    padded = np.pad(row_squared, ((spread, spread), (0, 0)), constant_values=np.inf)
+    best = row_squared
+    for dy in range(1, spread + 1):
+        best = np.minimum(best, padded[spread + dy : spread + dy + height] + dy * dy)
+        best = np.minimum(best, padded[spread - dy : spread - dy + height] + dy * dy)
+    return np.sqrt(best)
+
+
+def distance_field(mask: np.ndarray, spread: int) -> np.ndarray:
+    """
+    计算有符号距离场
+    Args:
+        mask: 字形内部为 True 的二维数组
+        spread: 距离场覆盖的范围，单位像素
+
+    Returns:
+        0 到 1 的浮点数组，0.5 为字形边缘，内部大于 0.5
+    """
+    signed = _distance_to(~mask, spread) - _distance_to(mask, spread)
+    return np.clip(0.5 + signed / (2 * spread), 0.0, 1.0)
+
+
+def apply_distance_field(glyph: Glyph, spread: int, downscale: int = 1) -> None:
+    """
+    把字符图片替换为距离场：RGB 为白色，透明度为距离值
+
+    四周各扩展 spread 个像素，再按 downscale 缩小，字符的尺寸和区域都换算到缩小后的大小
+    Args:
+        glyph: 已经解码的字符
+        spread: 距离场覆盖的范围，单位为原图像素
+        downscale: 缩小倍数
+    """
+    width, height = glyph.packed_size
+    if width and height:
+        alpha = np.asarray(glyph.image)[..., 3]
+        # 补齐到 downscale 的整数倍，缩小时每个输出像素正好对应 downscale x downscale 个原图像素
+        extra_w = -(width + 2 * spread) % downscale
+        extra_h = -(height + 2 * spread) % downscale
+        mask = np.pad(alpha >= INSIDE_THRESHOLD, ((spread, spread + extra_h), (spread, spread + extra_w)))
+        field = distance_field(mask, spread).astype(np.float32)
+        out_h, out_w = field.shape[0] // downscale, field.shape[1] // downscale
+        if downscale > 1:
+            field = np.asarray(Image.fromarray(field, "F").resize((out_w, out_h), Image.Resampling.BOX))
+
+        pixels = np.full((out_h, out_w, 4), 255, dtype=np.uint8)
+        pixels[..., 3] = np.rint(field * 255).astype(np.uint8)
+        glyph.image = Image.fromarray(pixels, "RGBA")
+
+        left, top, _right, _bottom = glyph.box
+        left, top = round((left - spread) / downscale), round((top - spread) / downscale)
+        glyph.box = (left, top, left + out_w, top + out_h)
+    else:
+        glyph.box = (0, 0, 0, 0)
+    glyph.width = round(glyph.width / downscale)
+    glyph.height = round(glyph.height / downscale)
+
+
+def load_sdf_glyph(
+    glyph: Glyph, trim: bool = False, hash_pixels: bool = False, spread: int = 4, downscale: int = 1
+) -> Glyph:
+    """
+    解码字符图片并转换为距离场，用于并发执行
+    """
+    load_glyph(glyph, trim=trim, hash_pixels=hash_pixels)
+    apply_distance_field(glyph, spread, downscale)
+    return glyph
@@ -0,0 +1,73 @@
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from .glyph import ImageRegion
+
+
+def find_runs(profile: np.ndarray, min_gap: int = 1) -> list[tuple[int, int]]:
+    """
+    查找投影中连续不为空的区间
+    Args:
+        profile: 一维布尔数组，True 表示这一行（列）有不透明的像素
+        min_gap: 至少间隔多少个空行（列）才算分开，小于这个间隔的区间合并
+
+    Returns:
+        区间列表 [(开始, 结束)]，不包含结束
+    """
+    # 在两端补 False，差分后 +1 为区间开始，-1 为区间结束
+    edges = np.diff(np.concatenate(([0], profile.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    runs: list[tuple[int, int]] = []
+    for start, end in zip(starts.tolist(), ends.tolist(), strict=True):
+        if runs and start - runs[-1][1] < min_gap:
+            runs[-1] = (runs[-1][0], end)
+        else:
+            runs.append((start, end))
+    return runs
+
+
+def slice_sheet(image: Image.Image, threshold: int = 0, min_gap: int = 1) -> list[tuple[int, int, int, int]]:
+    """
+    按透明度的行列投影切分精灵图，支持横条和多行的网格
+
+    先按行投影切出每一行字符，再在每一行内按列投影切出每个字符。同一行的字符使用整行的高度，保持基线对齐。
+    Args:
+        image: 精灵图
+        threshold: 透明度大于这个值的像素算作不透明
+        min_gap: 字符之间至少间隔多少个透明列（行），字符内部有断开的笔画时可以调大
+
+    Returns:
+        每个字符的区域 (left, top, right, bottom)，按从上到下、从左到右的顺序
+    """
+    opaque = np.asarray(image.convert("RGBA").getchannel("A")) > threshold
+    boxes = []
+    for top, bottom in find_runs(opaque.any(axis=1), min_gap):
+        for left, right in find_runs(opaque[top:bottom].any(axis=0), min_gap):
+            boxes.append((left, top, right, bottom))
+    return boxes
+
+
+def load_sheet(path: str | Path, characters: str, threshold: int = 0, min_gap: int = 1) -> list[dict]:
+    """
+    读取精灵图并切分为字符数据，图片只解码一次，字符为整张图片中的区域，不生成临时文件
+    Args:
+        path: 精灵图路径
+        characters: 按顺序对应每个字符的文字
+        threshold: 透明度大于这个值的像素算作不透明
+        min_gap: 字符之间至少间隔多少个透明列（行）
+
+    Returns:
+        字符数据列表，可以直接传给 FontGenerator
+    """
+    with Image.open(path) as image:
+        sheet = image.convert("RGBA")
+    boxes = slice_sheet(sheet, threshold, min_gap)
+    if len(boxes) != len(characters):
+        raise ValueError(f"{path} 中找到 {len(boxes)} 个字符，但提供了 {len(characters)} 个文字：{characters}")
+    return [
+        {"image_path": str(path), "image": ImageRegion(sheet, box), "value": value}
+        for box, value in zip(boxes, characters, strict=True)
+    ]
@@ -0,0 +1,20 @@
+import numpy as np
+from PIL import Image
+
+
+def find_alpha_bbox(image: Image.Image, threshold: int = 0) -> tuple[int, int, int, int] | None:
+    """
+    查找图片中不透明像素的包围盒，按行列整体扫描 alpha 通道，不逐像素遍历
+    Args:
+        image: RGBA 图片
+        threshold: alpha 大于该值的像素视为不透明
+
+    Returns:
+        包围盒 (left, top, right, bottom)，图片完全透明时返回 None
+    """
+    mask = np.asarray(image.getchannel("A")) > threshold
+    rows = np.flatnonzero(mask.any(axis=1))
+    if not rows.size:
+        return None
+    cols = np.flatnonzero(mask.any(axis=0))
+    return int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1
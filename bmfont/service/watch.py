@@ -0,0 +1,329 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Iterable
+from pathlib import Path
+
+from loguru import logger
+
+from .glyph import GlyphCache
+from .manifest import FontManifest, ManifestError, load_manifests
+
+# inotify 事件：写完关闭、移入、移出、删除、属性变化（部分编辑器保存时只改修改时间）
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+WATCH_MASK = IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE
+
+# struct inotify_event 的固定部分：wd、mask、cookie、len
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def normalize_path(path: str | Path) -> str:
+    """
+    统一路径的写法，用于比较
+    """
+    return os.path.normcase(os.path.abspath(path))
+
+
+class FileWatcher(ABC):
+    """
+    文件变化监视器
+    """
+
+    @abstractmethod
+    def watch(self, paths: Iterable[str]) -> None:
+        """
+        设置要监视的文件，替换之前的设置
+        Args:
+            paths: 文件路径
+        """
+
+    @abstractmethod
+    def wait(self, timeout: float | None = None) -> set[str]:
+        """
+        等待文件变化
+        Args:
+            timeout: 最长等待的秒数，None 表示一直等待
+
+        Returns:
+            发生变化的文件路径，超时时为空
+        """
+
+    @abstractmethod
+    def close(self) -> None:
+        """
+        停止监视，释放占用的资源
+        """
+
+
+class InotifyWatcher(FileWatcher):
+    """
+    使用 Linux inotify 监视文件所在的目录，文件保存后立即收到通知
+    """
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+        # 监视描述符 -> 目录
+        self._folders: dict[int, str] = {}
+        self._paths: set[str] = set()
+
+    def watch(self, paths: Iterable[str]) -> None:
+        self._paths = {normalize_path(path) for path in paths}
+        watched = set(self._folders.values())
+        for folder in {os.path.dirname(path) for path in self._paths} - watched:
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(folder), WATCH_MASK)
+            if wd < 0:
+                logger.warning(f"无法监视目录 {folder}：{os.strerror(ctypes.get_errno())}")
+                continue
+            self._folders[wd] = folder
+
+    def wait(self, timeout: float | None = None) -> set[str]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            readable, _, _ = select.select([self._fd], [], [], remaining)
+            if not readable:
+                return set()
+            changed = self._read_events()
+            if changed:
+                return changed
+
+    def _read_events(self) -> set[str]:
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # 事件太多时队列溢出，只能当作所有文件都变化了
+                return set(self._paths)
+            folder = self._folders.get(wd)
+            if folder and name:
+                path = normalize_path(os.path.join(folder, os.fsdecode(name)))
+                if path in self._paths:
+                    changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingWatcher(FileWatcher):
+    """
+    定时检查文件大小和修改时间，不支持 inotify 的系统使用
+    """
+
+    def __init__(self, interval: float = 0.2):
+        """
+        Args:
+            interval: 检查间隔，单位秒
+        """
+        self.interval = interval
+        self._stats: dict[str, tuple[int, int] | None] = {}
+
+    @staticmethod
+    def _stat(path: str) -> tuple[int, int] | None:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def watch(self, paths: Iterable[str]) -> None:
+        self._stats = {path: self._stat(path) for path in map(normalize_path, paths)}
+
+    def wait(self, timeout: float | None = None) -> set[str]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = set()
+            for path, old in self._stats.items():
+                new = self._stat(path)
+                if new != old:
+                    self._stats[path] = new
+                    changed.add(path)
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            time.sleep(self.interval if deadline is None else min(self.interval, max(deadline - time.monotonic(), 0)))
+
+    def close(self) -> None:
+        self._stats.clear()
+
+
+def create_watcher(polling: bool = False, interval: float = 0.2) -> FileWatcher:
+    """
+    创建文件监视器，优先使用 inotify，不可用时退回定时检查
+    Args:
+        polling: 是否强制使用定时检查
+        interval: 定时检查的间隔，单位秒
+
+    Returns:
+        文件监视器
+    """
+    if not polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher()
+        except (OSError, AttributeError) as e:
+            logger.warning(f"inotify 不可用，改为定时检查文件：{e}")
+    return PollingWatcher(interval)
+
+
+class FontWatcher:
+    """
+    监视清单和字符图片，文件变化后只重新生成受影响的字体
+
+    连续的文件事件合并为一次构建；每个字体保留解码结果缓存，没有变化的字符图片不再解码。
+    """
+
+    def __init__(
+        self,
+        manifest_paths: list[str],
+        debounce: float = 0.1,
+        polling: bool = False,
+        poll_interval: float = 0.2,
+        workers: int = 1,
+        formats: list[str] | None = None,
+    ):
+        """
+        Args:
+            manifest_paths: 清单文件路径
+            debounce: 最后一个文件事件之后等待的秒数，期间的事件合并为一次构建
+            polling: 是否强制使用定时检查代替 inotify
+            poll_interval: 定时检查的间隔，单位秒
+            workers: 每个字体加载字符图片的并发数
+            formats: 描述文件格式，覆盖清单中的配置
+        """
+        self.manifest_paths = [normalize_path(path) for path in manifest_paths]
+        self.debounce = debounce
+        self.workers = workers
+        self.formats = formats
+        self.watcher = create_watcher(polling, poll_interval)
+        self._stop_event = threading.Event()
+        # 清单路径 -> 其中的字体
+        self.manifests: dict[str, list[FontManifest]] = {}
+        # 字体名称 -> 解码结果缓存
+        self.glyph_caches: dict[str, GlyphCache] = {}
+
+    def stop(self) -> None:
+        """
+        停止监视，可以在其他线程中调用
+        """
+        self._stop_event.set()
+
+    def run(self) -> None:
+        """
+        构建所有字体，然后监视文件变化直到调用 stop
+        """
+        for path in self.manifest_paths:
+            self._load_manifest(path)
+        self._build([manifest for manifests in self.manifests.values() for manifest in manifests])
+        self._update_watch()
+        logger.info(f"正在监视 {len(self.manifest_paths)} 个清单的字符图片，按 Ctrl+C 停止")
+
+        try:
+            while not self._stop_event.is_set():
+                changed = self.watcher.wait(0.5)
+                if not changed:
+                    continue
+                # 合并连续的事件，保存一个文件可能产生多个事件，批量导出时会有很多文件
+                while more := self.watcher.wait(self.debounce):
+                    changed |= more
+                self._on_changed(changed)
+        finally:
+            self.watcher.close()
+
+    def _on_changed(self, changed: set[str]) -> None:
+        """
+        文件变化后重新生成受影响的字体
+        """
+        affected: dict[int, FontManifest] = {}
+        for path in self.manifest_paths:
+            if path in changed:
+                logger.info(f"清单 {path} 已修改，重新读取")
+                self._load_manifest(path)
+                affected.update((id(manifest), manifest) for manifest in self.manifests.get(path, []))
+
+        for path, manifests in list(self.manifests.items()):
+            changed_manifests = [
+                manifest for manifest in manifests if any(p in changed for p in self._glyph_paths(manifest))
+            ]
+            if not changed_manifests:
+                continue
+            if any(self._has_sheet(manifest) for manifest in changed_manifests) and path not in changed:
+                # 精灵图在读取清单时解码，修改后重新读取清单
+                self._load_manifest(path)
+                changed_manifests = [
+                    manifest
+                    for manifest in self.manifests[path]
+                    if any(p in changed for p in self._glyph_paths(manifest))
+                ]
+            affected.update((id(manifest), manifest) for manifest in changed_manifests)
+
+        self._update_watch()
+        if affected:
+            logger.info(f"{len(changed)} 个文件已修改，重新生成 {len(affected)} 个字体")
+            self._build(list(affected.values()))
+
+    def _load_manifest(self, path: str) -> None:
+        try:
+            self.manifests[path] = load_manifests(path)
+        except ManifestError as e:
+            # 清单保存到一半或者格式错误时保留上次的内容，继续监视
+            logger.error(str(e))
+            self.manifests.setdefault(path, [])
+
+    @staticmethod
+    def _character_data(manifest: FontManifest) -> list[dict]:
+        return manifest.character_data or [
+            char_data for font_data in manifest.channels.values() for char_data in font_data
+        ]
+
+    def _glyph_paths(self, manifest: FontManifest) -> set[str]:
+        return {normalize_path(char_data["image_path"]) for char_data in self._character_data(manifest)}
+
+    def _has_sheet(self, manifest: FontManifest) -> bool:
+        return any("image" in char_data for char_data in self._character_data(manifest))
+
+    def _update_watch(self) -> None:
+        paths = set(self.manifest_paths)
+        for manifests in self.manifests.values():
+            for manifest in manifests:
+                paths |= self._glyph_paths(manifest)
+        self.watcher.watch(paths)
+
+    def _build(self, manifests: list[FontManifest]) -> None:
+        for manifest in manifests:
+            overrides: dict = {"glyph_cache": self.glyph_caches.setdefault(manifest.name, GlyphCache())}
+            if "workers" not in manifest.options:
+                overrides["workers"] = self.workers
+            if self.formats:
+                overrides["formats"] = self.formats
+            try:
+                result = manifest.create_generator(**overrides).generate_font()
+            except Exception as e:
+                logger.error(f"{manifest.source} 构建字体 {manifest.name} 失败：{e}")
+                continue
+            logger.info(f"{manifest.name}：{result.summary()}")
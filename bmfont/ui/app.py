@@ -0,0 +1,63 @@
+import asyncio
+import functools
+import json
+import os
+import time
+from asyncio import Future
+
+import qasync
+from PySide6.QtCore import QLocale, QTimer
+from PySide6.QtWidgets import QApplication
+from qfluentwidgets import FluentTranslator
+
+from bmfont.ui.view.main import MainWindow
+
+# 设置这个环境变量时，窗口显示后输出启动的时间点并退出，用于 benchmarks/startup.py
+STARTUP_REPORT_ENV = "BMFONT_STARTUP_REPORT"
+# 界面模块导入完成的时间
+IMPORTED_AT = time.time()
+
+
+def report_startup(app: QApplication) -> None:
+    """
+    输出导入完成和窗口显示的时间点（Unix 时间戳），然后退出
+    """
+    print(json.dumps({"imported": IMPORTED_AT, "window": time.time()}), flush=True)
+    app.quit()
+
+
+async def async_main():
+    def close_future(_future):
+        loop = asyncio.get_event_loop()
+        loop.call_later(10, _future.cancel)
+        _future.cancel()
+
+    future: Future = asyncio.Future()
+
+    app = QApplication.instance()
+    if hasattr(app, "aboutToQuit"):
+        app.aboutToQuit.connect(functools.partial(close_future, future))
+
+    locale = QLocale(QLocale.Chinese, QLocale.China)
+    translator = FluentTranslator(locale)
+    app.installTranslator(translator)
+
+    window = MainWindow()
+    window.show()
+    if os.environ.get(STARTUP_REPORT_ENV):
+        # 事件循环处理完显示窗口的事件后才算窗口出现
+        QTimer.singleShot(0, functools.partial(report_startup, app))
+    await future
+
+
+def run_app() -> int:
+    """
+    启动图形界面
+    Returns:
+        退出码
+    """
+    try:
+        qasync.run(async_main())
+    except asyncio.exceptions.CancelledError:
+        pass
+    return 0
@@ -1,17 +1,25 @@
 from typing import Callable, Union
 
-from PySide6.QtCore import Qt
-from PySide6.QtGui import QIcon, QPixmap
+from PySide6.QtCore import QPointF, Qt, QTimer
+from PySide6.QtGui import QIcon
 from PySide6.QtWidgets import QFrame, QGraphicsPixmapItem, QGraphicsScene, QGraphicsView
 from qfluentwidgets import (
+    BodyLabel,
     ConfigItem,
     FluentIconBase,
     LineEdit,
+    MessageBoxBase,
     PrimaryPushButton,
+    ProgressBar,
+    PushButton,
     SettingCard,
+    SpinBox,
+    SubtitleLabel,
 )
 from qfluentwidgets.common.config import qconfig
 
+from bmfont.ui.common.utils import load_pixmap, load_region_pixmap
+
 
 class InputSettingCard(SettingCard):
     """Setting card with switch button"""
@@ -81,8 +89,33 @@ class FontSaveCard(InputSettingCard):
         self.hBoxLayout.addSpacing(16)
 
 
+class GenerateProgressCard(SettingCard):
+    """Setting card with progress bar and cancel button"""
+
+    def __init__(self, icon: Union[str, QIcon, FluentIconBase], title: str, btn_text: str, parent=None):
+        super().__init__(icon, title, "", parent)
+
+        self.progress_ui = ProgressBar(self)
+        self.progress_ui.setFixedWidth(300)
+        self.btn_ui = PushButton(btn_text)
+
+        self.hBoxLayout.addWidget(self.progress_ui, 0, Qt.AlignRight)
+        self.hBoxLayout.addSpacing(16)
+        self.hBoxLayout.addWidget(self.btn_ui, 0, Qt.AlignRight)
+        self.hBoxLayout.addSpacing(16)
+
+    def setValue(self, title: str, done: int, total: int):
+        self.setTitle(title)
+        self.setContent(f"{done}/{total}")
+        self.progress_ui.setRange(0, max(total, 1))
+        self.progress_ui.setValue(done)
+
+
 class FontPreviewCard(SettingCard):
-    """Setting card with switch button"""
+    """Setting card with preview view"""
+
+    # 合并连续修改的等待时间（毫秒）
+    refresh_delay = 50
 
     def __init__(
         self,
@@ -97,13 +130,23 @@ class FontPreviewCard(SettingCard):
         self.input_ui = LineEdit()
         self.input_ui.setFixedWidth(300)
 
+        # 场景和图像项一直复用，刷新时只修改有变化的图像项
         self.preview_scene = QGraphicsScene()
+        self.preview_items: list[QGraphicsPixmapItem] = []
+        # 每个图像项的图片来源：路径或内存中的图片区域
+        self.preview_item_paths: list = []
         self.preview_view = QGraphicsView(self)
         self.preview_view.setScene(self.preview_scene)
         self.preview_view.setFixedSize(400, self.input_ui.height())
         self.preview_view.setFrameShape(QFrame.Shape.NoFrame)
         self.preview_view.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
 
+        # 连续输入或修改表格时合并成一次刷新
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(self.refresh_delay)
+        self.refresh_timer.timeout.connect(self.refresh)
+
         self.hBoxLayout.addWidget(self.preview_view, 0, Qt.AlignRight)
         self.hBoxLayout.addWidget(self.input_ui, 0, Qt.AlignRight)
         self.hBoxLayout.addSpacing(16)
@@ -116,35 +159,103 @@ class FontPreviewCard(SettingCard):
 
     def setValue(self, value: str):
         self.input_ui.setText(value)
-        self.preview_scene = QGraphicsScene()
-        self.preview_view.setScene(self.preview_scene)
+        self.schedule_refresh()
+
+    def schedule_refresh(self):
+        """
+        稍后刷新预览，等待时间内的多次调用只刷新一次
+        """
+        self.refresh_timer.start()
+
+    @staticmethod
+    def load_preview_pixmap(source):
+        """
+        加载预览图片
+        Args:
+            source: 图片路径或内存中的图片区域
+        """
+        return load_pixmap(source) if isinstance(source, str) else load_region_pixmap(source)
+
+    def refresh(self):
+        """
+        刷新预览：位置变化的图像项只移动，图片变化的图像项只替换图片
+        """
+        self.refresh_timer.stop()
 
         offset = 30  # 调整的位置偏移量，可以根据需要调整
 
-        for _index, char in enumerate(value):
+        index = 0
+        for char in self.value:
             img_data = self.get_font_data_func(char)
             if not img_data:
                 continue
 
-            img_path = img_data["path"]
+            # 内存中的图片区域优先，否则按路径加载
+            img_path = img_data.get("region") or img_data["path"]
             x_offset = img_data["x_offset"]
             y_offset = img_data["y_offset"]
-            width = img_data["width"]
+            # 导入的字体使用原来的前进宽度
+            advance = img_data["width"] if img_data.get("xadvance") is None else img_data["xadvance"]
 
             offset += x_offset
 
-            # 创建QPixmap并设置图片
-            pixmap = QPixmap(img_path)
-
-            # 创建QGraphicsPixmapItem并设置位置
-            pixmap_item = QGraphicsPixmapItem(pixmap)
-            pixmap_item.setPos(offset, y_offset)
-
-            # 添加新的图像项
-            self.preview_scene.addItem(pixmap_item)
-
-            offset += width
+            if index < len(self.preview_items):
+                # 复用已有的图像项
+                pixmap_item = self.preview_items[index]
+                if self.preview_item_paths[index] != img_path:
+                    pixmap_item.setPixmap(self.load_preview_pixmap(img_path))
+                    self.preview_item_paths[index] = img_path
+            else:
+                # 创建QGraphicsPixmapItem并添加到场景
+                pixmap_item = QGraphicsPixmapItem(self.load_preview_pixmap(img_path))
+                self.preview_scene.addItem(pixmap_item)
+                self.preview_items.append(pixmap_item)
+                self.preview_item_paths.append(img_path)
+
+            if pixmap_item.pos() != QPointF(offset, y_offset):
+                pixmap_item.setPos(offset, y_offset)
+
+            offset += advance
+            index += 1
+
+        # 删除多余的图像项
+        for pixmap_item in self.preview_items[index:]:
+            self.preview_scene.removeItem(pixmap_item)
+        del self.preview_items[index:]
+        del self.preview_item_paths[index:]
 
         # 调整预览视图的显示范围
         items_rect = self.preview_scene.itemsBoundingRect()
         self.preview_view.fitInView(items_rect, Qt.KeepAspectRatio)
+
+
+class SheetImportDialog(MessageBoxBase):
+    """
+    导入精灵图：输入按顺序对应每个字符的文字
+    """
+
+    def __init__(self, sheet_path: str, parent=None):
+        super().__init__(parent)
+        self.title_label = SubtitleLabel("导入精灵图", self)
+        self.characters_input = LineEdit(self)
+        self.characters_input.setPlaceholderText("按从左到右、从上到下的顺序输入字符，例如 0123456789")
+        self.characters_input.setMinimumWidth(360)
+        self.min_gap_input = SpinBox(self)
+        self.min_gap_input.setRange(1, 64)
+        self.min_gap_input.setValue(1)
+        self.min_gap_input.setToolTip("字符之间至少间隔的透明像素，字符内部有断开的笔画时调大")
+
+        self.viewLayout.addWidget(self.title_label)
+        self.viewLayout.addWidget(BodyLabel(sheet_path, self))
+        self.viewLayout.addWidget(self.characters_input)
+        self.viewLayout.addWidget(self.min_gap_input)
+        self.yesButton.setText("导入")
+        self.cancelButton.setText("取消")
+
+    @property
+    def characters(self) -> str:
+        return self.characters_input.text()
+
+    @property
+    def min_gap(self) -> int:
+        return self.min_gap_input.value()
@@ -0,0 +1,206 @@
+import functools
+
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, QPersistentModelIndex, QRect, Qt
+from PySide6.QtGui import QImageReader, QPainter, QPixmap
+from PySide6.QtWidgets import QStyleOptionViewItem
+from qfluentwidgets import TableItemDelegate
+
+from bmfont.service.glyph import ImageRegion
+from bmfont.service.glyph_store import GlyphStore
+from bmfont.ui.common.utils import load_region_pixmap
+
+# 缩略图的高度，也是表格的行高
+THUMBNAIL_SIZE = 48
+
+# 表格各列：图片、字符、X偏移、Y偏移、宽度、高度
+COLUMN_IMAGE, COLUMN_VALUE, COLUMN_XOFFSET, COLUMN_YOFFSET, COLUMN_WIDTH, COLUMN_HEIGHT = range(6)
+HEADERS = ["图片", "ID", "X偏移", "Y偏移", "宽度", "高度"]
+
+# 图片路径
+ImagePathRole = Qt.UserRole + 1
+# 内存中的图片区域
+ImageRegionRole = Qt.UserRole + 2
+
+
+class GlyphTableModel(QAbstractTableModel):
+    """
+    字符表格的数据模型，数据保存在 GlyphStore 中
+    """
+
+    def __init__(self, store: GlyphStore, parent=None):
+        super().__init__(parent)
+        self.store = store
+
+    def rowCount(self, parent: QModelIndex | QPersistentModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.store)
+
+    def columnCount(self, parent: QModelIndex | QPersistentModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return HEADERS[section]
+        return None
+
+    def data(self, index: QModelIndex | QPersistentModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        entry = self.store[index.row()]
+        column = index.column()
+        if role == ImagePathRole:
+            return entry.image_path
+        if role == ImageRegionRole:
+            return entry.region
+        if role == Qt.TextAlignmentRole:
+            return int(Qt.AlignHCenter | Qt.AlignVCenter)
+        if role not in (Qt.DisplayRole, Qt.EditRole):
+            return None
+
+        if column == COLUMN_VALUE:
+            return entry.value
+        # 编辑和排序使用数值，显示使用文本
+        number = {
+            COLUMN_XOFFSET: entry.xoffset,
+            COLUMN_YOFFSET: entry.yoffset,
+            COLUMN_WIDTH: entry.width,
+            COLUMN_HEIGHT: entry.height,
+        }.get(column)
+        if number is None:
+            return None
+        return number if role == Qt.EditRole else str(number)
+
+    def setData(self, index: QModelIndex | QPersistentModelIndex, value, role: int = Qt.EditRole) -> bool:
+        if not index.isValid() or role != Qt.EditRole:
+            return False
+
+        row, column = index.row(), index.column()
+        entry = self.store[row]
+        if column == COLUMN_VALUE:
+            value = str(value)
+            if not value:
+                return False
+            self.store.set_value(row, value)
+        elif column in (COLUMN_XOFFSET, COLUMN_YOFFSET):
+            try:
+                number = int(value)
+            except (TypeError, ValueError):
+                return False
+            if column == COLUMN_XOFFSET:
+                entry.xoffset = number
+            else:
+                entry.yoffset = number
+        else:
+            return False
+
+        self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole])
+        return True
+
+    def flags(self, index: QModelIndex | QPersistentModelIndex) -> Qt.ItemFlag:
+        flags = super().flags(index)
+        if index.column() in (COLUMN_VALUE, COLUMN_XOFFSET, COLUMN_YOFFSET):
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def append_images(self, paths: list[str]) -> None:
+        """
+        添加图片，只插入新增的行
+        Args:
+            paths: 图片路径列表
+        """
+        if not paths:
+            return
+        start = len(self.store)
+        self.beginInsertRows(QModelIndex(), start, start + len(paths) - 1)
+        self.store.append_images(paths)
+        self.endInsertRows()
+
+    def append_character_data(self, character_data: list[dict]) -> None:
+        """
+        添加内存中的字符，只插入新增的行
+        Args:
+            character_data: 字符数据列表，image 为图片区域
+        """
+        if not character_data:
+            return
+        start = len(self.store)
+        self.beginInsertRows(QModelIndex(), start, start + len(character_data) - 1)
+        self.store.append_character_data(character_data)
+        self.endInsertRows()
+
+    def remove_rows(self, rows: list[int]) -> None:
+        """
+        删除多行
+        Args:
+            rows: 行号列表
+        """
+        if not rows:
+            return
+        self.beginResetModel()
+        self.store.remove_rows(rows)
+        self.endResetModel()
+
+    def clear(self) -> None:
+        self.beginResetModel()
+        self.store.clear()
+        self.endResetModel()
+
+
+@functools.lru_cache(maxsize=1024)
+def load_thumbnail(path: str, size: int = THUMBNAIL_SIZE) -> QPixmap:
+    """
+    加载缩略图，直接解码成小图，缩略图比原图小得多，可以多缓存一些
+    Args:
+        path: 图片路径
+        size: 缩略图最大宽高
+
+    Returns:
+        缩略图
+    """
+    reader = QImageReader(path)
+    image_size = reader.size()
+    if image_size.width() > size or image_size.height() > size:
+        reader.setScaledSize(image_size.scaled(size, size, Qt.KeepAspectRatio))
+    return QPixmap.fromImage(reader.read())
+
+
+@functools.lru_cache(maxsize=1024)
+def load_region_thumbnail(region: ImageRegion, size: int = THUMBNAIL_SIZE) -> QPixmap:
+    """
+    内存中图片区域的缩略图
+    Args:
+        region: 图片区域
+        size: 缩略图最大宽高
+
+    Returns:
+        缩略图
+    """
+    pixmap = load_region_pixmap(region)
+    if pixmap.width() > size or pixmap.height() > size:
+        pixmap = pixmap.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    return pixmap
+
+
+class GlyphItemDelegate(TableItemDelegate):
+    """
+    字符表格的代理，在图片列绘制缩略图，只有可见的行才会绘制
+    """
+
+    def paint(self, painter: QPainter, option: QStyleOptionViewItem, index: QModelIndex) -> None:
+        super().paint(painter, option, index)
+        if index.column() != COLUMN_IMAGE:
+            return
+
+        region = index.data(ImageRegionRole)
+        path = index.data(ImagePathRole)
+        if region:
+            pixmap = load_region_thumbnail(region)
+        elif path:
+            pixmap = load_thumbnail(path)
+        else:
+            return
+
+        rect: QRect = option.rect
+        x = rect.x() + (rect.width() - pixmap.width()) // 2
+        y = rect.y() + (rect.height() - pixmap.height()) // 2
+        painter.drawPixmap(x, y, pixmap)
@@ -1,10 +1,14 @@
 import asyncio
+import functools
 import inspect
 from typing import Callable
 
+from PySide6.QtGui import QImage, QPixmap
 from PySide6.QtWidgets import QAbstractButton
 from qfluentwidgets import MessageBox
 
+from bmfont.service.glyph import ImageRegion
+
 
 def add_btn_click_event(btn: QAbstractButton, func: Callable, click_text: str = "", *args, **kwargs):
     """
@@ -39,6 +43,35 @@ def add_btn_click_event(btn: QAbstractButton, func: Callable, click_text: str =
     btn.clicked.connect(_cb)
 
 
+@functools.lru_cache(maxsize=256)
+def load_pixmap(path: str) -> QPixmap:
+    """
+    加载图片，最近使用的图片缓存在内存中，避免每次预览都从磁盘解码
+    Args:
+        path: 图片路径
+
+    Returns:
+        图片
+    """
+    return QPixmap(path)
+
+
+@functools.lru_cache(maxsize=256)
+def load_region_pixmap(region: ImageRegion) -> QPixmap:
+    """
+    把内存中的图片区域（精灵图、图集中的字符）转换为 QPixmap，同样缓存最近使用的结果
+    Args:
+        region: 图片区域
+
+    Returns:
+        图片
+    """
+    image = region.crop().convert("RGBA")
+    data = image.tobytes()
+    # fromImage 会复制像素，data 只需要在这次调用期间有效
+    return QPixmap.fromImage(QImage(data, image.width, image.height, image.width * 4, QImage.Format_RGBA8888))
+
+
 def show_message_box(
     parent,
     title: str,
@@ -1,74 +1,111 @@
+import asyncio
 from pathlib import Path
 
-from PySide6.QtCore import Qt
-from PySide6.QtGui import QColor, QDragEnterEvent, QDropEvent, QIcon, QKeyEvent, QPixmap
+from loguru import logger
+from PySide6.QtCore import QModelIndex, QSortFilterProxyModel, Qt
+from PySide6.QtGui import QColor, QDragEnterEvent, QDropEvent, QIcon, QKeyEvent
 from PySide6.QtWidgets import (
     QApplication,
     QFileDialog,
     QHBoxLayout,
     QHeaderView,
-    QLabel,
-    QTableWidgetItem,
     QVBoxLayout,
     QWidget,
 )
 from qfluentwidgets import (
     FluentIcon,
     PrimaryPushButton,
+    PushButton,
     SubtitleLabel,
-    TableWidget,
+    TableView,
     setFont,
 )
 
-from bmfont.service import FontGenerator
-from bmfont.ui.common.components import FontPreviewCard, FontSaveCard
-from bmfont.ui.common.utils import add_btn_click_event, show_message_box
+# 界面启动时就需要生成器，直接导入模块，打包时 Nuitka 可以跟踪到
+from bmfont.service.font_generator import FontGenerator, GenerationCancelled
+from bmfont.service.glyph_store import GlyphStore
+from bmfont.service.profiler import STAGES
+from bmfont.ui.common.components import FontPreviewCard, FontSaveCard, GenerateProgressCard, SheetImportDialog
+from bmfont.ui.common.glyph_table import (
+    COLUMN_VALUE,
+    COLUMN_YOFFSET,
+    THUMBNAIL_SIZE,
+    GlyphItemDelegate,
+    GlyphTableModel,
+    load_region_thumbnail,
+    load_thumbnail,
+)
+from bmfont.ui.common.utils import add_btn_click_event, load_pixmap, load_region_pixmap, show_message_box
 
 
 class MainWindow(QWidget):
-    font_dict: dict[int, str] = {}
-    images: list[str] = []
-
     def __init__(self, parent=None):
         super().__init__(parent=parent)
         self.setObjectName("BitMapFontUi")
 
+        # 字符列表，表格和生成器共用
+        self.glyph_store = GlyphStore()
+        self.font_model = GlyphTableModel(self.glyph_store, self)
+        self.font_proxy_model = QSortFilterProxyModel(self)
+        self.font_proxy_model.setSourceModel(self.font_model)
+        self.font_proxy_model.setSortRole(Qt.EditRole)
+
         self.label = SubtitleLabel("点击或拖入图片进行制作", self)
         self.label.setAlignment(Qt.AlignCenter)
         self.label.setTextColor(QColor(99, 99, 99))
         setFont(self.label, 24)
 
         self.btn_reset = PrimaryPushButton("重置", self)
-
-        self.font_table = TableWidget(self)
+        self.btn_import_sheet = PushButton("导入精灵图", self)
+        self.btn_import_fnt = PushButton("导入字体", self)
+        # 导入已有字体时保留原来的行高和基线，作为生成参数
+        self.font_options: dict = {}
+
+        # 表格只绘制可见的行，行高固定，不需要为每一行计算尺寸
+        self.font_table = TableView(self)
+        self.font_table.setModel(self.font_proxy_model)
+        self.font_table.setItemDelegate(GlyphItemDelegate(self.font_table))
         self.font_table.setWordWrap(False)
-        self.font_table.setColumnCount(6)
         self.font_table.verticalHeader().hide()
-        self.font_table.setHorizontalHeaderLabels(["图片", "ID", "X偏移", "Y偏移", "宽度", "高度"])
-        self.font_table.resizeColumnsToContents()
+        self.font_table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.font_table.verticalHeader().setDefaultSectionSize(THUMBNAIL_SIZE + 4)
         self.font_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        self.font_table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.font_table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
         self.font_table.setSortingEnabled(True)
 
         self.prew_img = FontPreviewCard(icon=FluentIcon.FONT, title="预览", get_font_data_func=self.get_font_data)
 
         self.input_btn_generate = FontSaveCard(icon=FluentIcon.FONT, title="字体名称", btn_text="生成")
+        self.generate_progress = GenerateProgressCard(icon=FluentIcon.SYNC, title="生成中", btn_text="取消")
+        self.generate_progress.hide()
+        self.generator: FontGenerator | None = None
         self.font_opts_widget = QWidget()
         self.v_layout = QVBoxLayout(self.font_opts_widget)
         self.v_layout.addWidget(self.prew_img)
         self.v_layout.addWidget(self.font_table)
         self.v_layout.addWidget(self.input_btn_generate)
+        self.v_layout.addWidget(self.generate_progress)
         self.v_layout.addWidget(self.btn_reset)
         self.font_opts_widget.hide()
 
+        # 开始界面：点击或拖入单个字符图片，或者导入一张精灵图、一个已有的字体
+        self.start_widget = QWidget()
+        self.start_layout = QVBoxLayout(self.start_widget)
+        self.start_layout.addWidget(self.label, 0, Qt.AlignCenter)
+        self.start_layout.addWidget(self.btn_import_sheet, 0, Qt.AlignCenter)
+        self.start_layout.addWidget(self.btn_import_fnt, 0, Qt.AlignCenter)
+
         layout = QHBoxLayout(self)
-        layout.addWidget(self.label, 1, Qt.AlignCenter)
+        layout.addWidget(self.start_widget, 1, Qt.AlignCenter)
         layout.addWidget(self.font_opts_widget)
 
         add_btn_click_event(self.btn_reset, self.on_click_reset)
+        self.btn_import_sheet.clicked.connect(self.on_click_import_sheet)
+        self.btn_import_fnt.clicked.connect(self.on_click_import_fnt)
         add_btn_click_event(self.input_btn_generate.btn_ui, self.on_click_generate)
+        self.generate_progress.btn_ui.clicked.connect(self.on_click_cancel)
 
-        self.font_table.itemChanged.connect(self.on_item_changed)
+        self.font_model.dataChanged.connect(self.on_data_changed)
 
         self.init_window()
         self.setAcceptDrops(True)
@@ -108,7 +145,10 @@ class MainWindow(QWidget):
         Returns:
 
         """
-        images_ulrs = [url.toLocalFile() for url in event.mimeData().urls() if url.toLocalFile().endswith("png")]
+        paths = [url.toLocalFile() for url in event.mimeData().urls()]
+        for fnt_path in [path for path in paths if path.endswith(".fnt")]:
+            self.input_fnt(fnt_path)
+        images_ulrs = [path for path in paths if path.endswith("png")]
         if not images_ulrs:
             return
 
@@ -125,7 +165,9 @@ class MainWindow(QWidget):
         """
         if not self.acceptDrops():
             return
-        images_ulrs = QFileDialog.getOpenFileNames(self, "选择图片", "D:\\work\\arts\\slots一版切图", "PNG Files(*.png);")[0]
+        images_ulrs = QFileDialog.getOpenFileNames(
+            self, "选择图片", "D:\\work\\arts\\slots一版切图", "PNG Files(*.png);"
+        )[0]
         if not images_ulrs:
             return
 
@@ -144,13 +186,14 @@ class MainWindow(QWidget):
         if event.key() != Qt.Key_Delete:
             return super().keyPressEvent(event)
 
-        row_indexs = {row.row() for row in self.font_table.selectedItems()}
-        for row_index in row_indexs:
-            self.font_table.removeRow(row_index)
-            img = self.font_dict.pop(row_index)
-            del self.images[self.images.index(img)]
+        selected_rows = self.font_table.selectionModel().selectedRows()
+        if not selected_rows:
+            selected_rows = self.font_table.selectionModel().selectedIndexes()
+        row_indexs = {self.font_proxy_model.mapToSource(index).row() for index in selected_rows}
+        self.font_model.remove_rows(sorted(row_indexs))
+        self.prew_img.schedule_refresh()
 
-        if not self.images:
+        if not len(self.glyph_store):
             self.on_click_reset()
 
         event.accept()
@@ -158,57 +201,81 @@ class MainWindow(QWidget):
 
     def input_images(self, paths: list[str]):
         """
-        输入图片
+        输入图片，只添加新的行
         Args:
             paths: 图片路径列表
 
         Returns:
 
         """
-        self.images.extend(paths)
-        self.label.hide()
+        self.start_widget.hide()
+        self.font_opts_widget.show()
+        self.font_model.append_images(paths)
+        self.prew_img.schedule_refresh()
+
+    def on_click_import_sheet(self):
+        """
+        点击导入精灵图按钮：选择图片，输入对应的字符，切分后加入表格
+        Returns:
+
+        """
+        sheet_path = QFileDialog.getOpenFileName(self, "选择精灵图", "", "PNG Files(*.png);")[0]
+        if not sheet_path:
+            return
+
+        dialog = SheetImportDialog(sheet_path, self)
+        if not dialog.exec() or not dialog.characters:
+            return
+
+        from bmfont.service.sheet import load_sheet
+
+        try:
+            character_data = load_sheet(sheet_path, dialog.characters, min_gap=dialog.min_gap)
+        except (OSError, ValueError) as e:
+            show_message_box(self, "导入失败", str(e), hide_cancel_btn=True)
+            return
+
+        self.setAcceptDrops(False)
+        self.start_widget.hide()
         self.font_opts_widget.show()
+        self.font_model.append_character_data(character_data)
+        self.prew_img.schedule_refresh()
+
+    def on_click_import_fnt(self):
+        """
+        点击导入字体按钮：选择已有的描述文件
+        Returns:
 
-        for i, path in enumerate(self.images):
-            self.font_dict[i] = path
-            self.font_table.setRowCount(i + 1)
-
-            # 设置第一列：图片
-            icon_lab = QLabel()
-            icon_pixmap = QPixmap(path)
-            icon_lab.setPixmap(icon_pixmap)
-            icon_lab.setAlignment(Qt.AlignHCenter)
-            self.font_table.setCellWidget(i, 0, icon_lab)
-
-            # 设置第二列：图片ID
-            img_name = Path(path).stem
-            data = img_name.split("_")[-1]
-            data = str(int(data)) if data.isdigit() else data
-            table_widget_item = QTableWidgetItem(data)
-            table_widget_item.setTextAlignment(Qt.AlignHCenter | Qt.AlignVCenter)
-            self.font_table.setItem(i, 1, QTableWidgetItem(table_widget_item))
-
-            # 设置第三列：X偏移
-            xoffset = "0"
-            item_x = QTableWidgetItem(xoffset)
-            item_x.setTextAlignment(Qt.AlignHCenter | Qt.AlignVCenter)
-            self.font_table.setItem(i, 2, QTableWidgetItem(item_x))
-
-            # 设置第四列：Y偏移
-            yoffset = "0"
-            item_y = QTableWidgetItem(yoffset)
-            item_y.setTextAlignment(Qt.AlignHCenter | Qt.AlignVCenter)
-            self.font_table.setItem(i, 3, QTableWidgetItem(item_y))
-
-            # 设置第五列：图片宽度
-            item_w = QTableWidgetItem(str(icon_pixmap.width()))
-            item_w.setTextAlignment(Qt.AlignHCenter | Qt.AlignVCenter)
-            self.font_table.setItem(i, 4, QTableWidgetItem(item_w))
-
-            # 设置第六列：图片高度
-            item_h = QTableWidgetItem(str(icon_pixmap.height()))
-            item_h.setTextAlignment(Qt.AlignHCenter | Qt.AlignVCenter)
-            self.font_table.setItem(i, 5, QTableWidgetItem(item_h))
+        """
+        fnt_path = QFileDialog.getOpenFileName(self, "选择字体", "", "BMFont Files(*.fnt *.bin);")[0]
+        if fnt_path:
+            self.input_fnt(fnt_path)
+
+    def input_fnt(self, path: str):
+        """
+        导入已有的字体，字符为大图中的区域，可以修改后重新打包
+        Args:
+            path: 描述文件路径
+
+        Returns:
+
+        """
+        from bmfont.service.fnt_import import load_fnt
+
+        try:
+            imported = load_fnt(path)
+        except (OSError, ValueError) as e:
+            show_message_box(self, "导入失败", str(e), hide_cancel_btn=True)
+            return
+
+        self.font_options = imported.options
+        if not self.input_btn_generate.value:
+            self.input_btn_generate.setValue(Path(path).stem)
+        self.setAcceptDrops(False)
+        self.start_widget.hide()
+        self.font_opts_widget.show()
+        self.font_model.append_character_data(imported.character_data)
+        self.prew_img.schedule_refresh()
 
     def on_click_reset(self):
         """
@@ -218,27 +285,29 @@ class MainWindow(QWidget):
         """
         self.prew_img.setValue("")
         self.input_btn_generate.setValue("")
-        self.font_table.clear()
-        self.font_table.setHorizontalHeaderLabels(["图片", "ID", "X偏移", "Y偏移", "宽度", "高度"])
+        self.font_model.clear()
+        self.font_options = {}
         self.font_opts_widget.hide()
-        self.label.show()
+        self.start_widget.show()
         self.setAcceptDrops(True)
-        self.images.clear()
-        self.font_dict.clear()
+        load_pixmap.cache_clear()
+        load_region_pixmap.cache_clear()
+        load_thumbnail.cache_clear()
+        load_region_thumbnail.cache_clear()
 
-    def on_item_changed(self, item: QTableWidgetItem):
+    def on_data_changed(self, top_left: QModelIndex, bottom_right: QModelIndex, roles=()):
         """
-        当表格中的项被更改时调用
+        当表格中的数据被更改时调用
         """
         # 确保只有在 Id、X偏移 或 Y偏移 更改时才重新渲染预览
-        if item.column() in (1, 2, 3):  # 1、2 和 3 分别是 ID、X偏移 和 Y偏移 的列索引
+        if top_left.column() <= COLUMN_YOFFSET and bottom_right.column() >= COLUMN_VALUE:
             self.update_preview()
 
     def update_preview(self):
         """
         更新预览
         """
-        self.prew_img.setValue(self.prew_img.value)
+        self.prew_img.schedule_refresh()
 
     def get_font_data(self, char: str):
         """
@@ -249,30 +318,22 @@ class MainWindow(QWidget):
         Returns:
             字体图片数据
         """
-        font_data = {}
-        for row in range(self.font_table.rowCount()):
-            image_path = self.font_dict[row]
-            value = self.font_table.item(row, 1).text()
-            xoffset = self.font_table.item(row, 2).text()
-            yoffset = self.font_table.item(row, 3).text()
-            width = self.font_table.item(row, 4).text()
-            height = self.font_table.item(row, 5).text()
-
-            if value == char:
-                font_data = {
-                    "path": image_path,
-                    "x_offset": float(xoffset),
-                    "y_offset": float(yoffset),
-                    "width": float(width),
-                    "height": float(height),
-                }
-                break
-
-        return font_data
-
-    def on_click_generate(self):
+        entry = self.glyph_store.find(char)
+        if not entry:
+            return {}
+        return {
+            "path": entry.image_path,
+            "region": entry.region,
+            "x_offset": entry.xoffset,
+            "y_offset": entry.yoffset,
+            "width": entry.width,
+            "height": entry.height,
+            "xadvance": entry.xadvance,
+        }
+
+    async def on_click_generate(self):
         """
-        点击生成按钮
+        点击生成按钮，在线程池中生成，界面显示进度
         Returns:
 
         """
@@ -280,22 +341,55 @@ class MainWindow(QWidget):
             show_message_box(self, "错误", "请输入保存名字", hide_cancel_btn=True)
             return
 
-        character_data = []
-        for row in range(self.font_table.rowCount()):
-            image_path = self.font_dict[row]
-            value = self.font_table.item(row, 1).text()
-            xoffset = self.font_table.item(row, 2).text()
-            yoffset = self.font_table.item(row, 3).text()
-
-            character_data.append({"image_path": image_path, "value": value, "xoffset": xoffset, "yoffset": yoffset})
+        character_data = self.glyph_store.to_character_data()
 
         folder = QFileDialog.getExistingDirectory(self, "选择文件夹", "D:\\work\\client-game\\assets")
         if not folder or not Path(folder).exists():
             return
 
-        generator = FontGenerator(
-            character_data=character_data, output_folder=folder, name=self.input_btn_generate.value
+        loop = asyncio.get_running_loop()
+
+        def on_progress(stage: str, done: int, total: int):
+            # 回调在生成线程中调用，转到界面线程更新进度
+            loop.call_soon_threadsafe(self.generate_progress.setValue, STAGES[stage], done, total)
+
+        self.generator = FontGenerator(
+            character_data=character_data,
+            output_folder=folder,
+            name=self.input_btn_generate.value,
+            progress_callback=on_progress,
+            **self.font_options,
         )
-        generator.generate_font()
-        show_message_box(self, "生成成功", hide_cancel_btn=True)
-        self.on_click_reset()
+        self.btn_reset.setDisabled(True)
+        self.generate_progress.btn_ui.setDisabled(False)
+        self.generate_progress.setValue("准备生成", 0, 0)
+        self.generate_progress.show()
+        success = False
+        try:
+            result = await loop.run_in_executor(None, self.generator.generate_font)
+        except GenerationCancelled:
+            title, content = "已取消生成", ""
+        except Exception as e:
+            logger.exception("生成失败")
+            title, content = "生成失败", str(e)
+        else:
+            success = True
+            title, content = "生成成功", result.summary()
+        finally:
+            self.generator = None
+            self.generate_progress.hide()
+            self.btn_reset.setDisabled(False)
+
+        show_message_box(self, title, content, hide_cancel_btn=True)
+        if success:
+            self.on_click_reset()
+
+    def on_click_cancel(self):
+        """
+        点击取消按钮
+        Returns:
+
+        """
+        if self.generator:
+            self.generator.cancel()
+            self.generate_progress.btn_ui.setDisabled(True)
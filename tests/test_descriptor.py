@@ -0,0 +1,53 @@
+import pytest
+
+from bmfont.service.descriptor import (
+    BinaryWriter,
+    CharInfo,
+    FontDescriptor,
+    KerningInfo,
+    TextWriter,
+    parse_binary,
+    parse_descriptor,
+    parse_text,
+)
+
+
+def make_descriptor():
+    return FontDescriptor(
+        face="ui font",
+        size=32,
+        line_height=40,
+        base=30,
+        scale_w=256,
+        scale_h=128,
+        pages=["ui_0.png", "ui_1.png"],
+        chars=[
+            CharInfo(65, 0, 0, 20, 30, -1, 2, 19, page=0, chnl=15),
+            CharInfo(86, 21, 0, 22, 30, 0, 2, 21, page=0, chnl=15),
+            CharInfo(0x4E00, 3, 5, 32, 32, 0, -4, 32, page=1, chnl=15),
+        ],
+        kernings=[KerningInfo(65, 86, -3), KerningInfo(86, 65, -2), KerningInfo(65, 0x4E00, 1)],
+        spacing=(2, 3),
+        padding=(1, 2, 3, 4),
+        packed=True,
+        alpha_chnl=0,
+        red_chnl=4,
+        green_chnl=4,
+        blue_chnl=4,
+    )
+
+
+@pytest.mark.parametrize("writer, parse", [(BinaryWriter(), parse_binary), (TextWriter(), parse_text)])
+def test_round_trip(writer, parse):
+    descriptor = make_descriptor()
+    data = writer.dumps(descriptor)
+
+    assert parse(data) == descriptor
+    assert parse_descriptor(data) == descriptor
+
+
+def test_binary_page_names_must_have_same_length():
+    descriptor = make_descriptor()
+    descriptor.pages = ["ui_0.png", "ui_10.png"]
+    with pytest.raises(ValueError):
+        BinaryWriter().dumps(descriptor)
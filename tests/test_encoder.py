@@ -0,0 +1,51 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from bmfont.service.encoder import PngStreamWriter
+
+
+def random_pixels(width, height, color_mode):
+    rng = np.random.default_rng(width * 1000 + height)
+    pixels = rng.integers(0, 256, (height, width, 4), dtype=np.uint8)
+    # 加入平滑的区域，让每种过滤方式都有机会被选中
+    pixels[: height // 2, :, :] = np.arange(width, dtype=np.uint8)[None, :, None] * 3
+    if color_mode == "alpha":
+        # 只保存透明度时字符必须是单色的
+        pixels[..., :3] = 255
+    return pixels
+
+
+def write_bands(pixels, band_height, color_mode):
+    height, width = pixels.shape[:2]
+    stream = io.BytesIO()
+    with PngStreamWriter(stream, width, height, color_mode) as png:
+        for top in range(0, height, band_height):
+            png.write(pixels[top : top + band_height])
+    assert png.size == len(stream.getvalue())
+    return stream.getvalue()
+
+
+@pytest.mark.parametrize("color_mode", ["rgba", "alpha"])
+@pytest.mark.parametrize("width, height, band_height", [(1, 5, 2), (7, 37, 8), (33, 50, 20), (300, 300, 64)])
+def test_bands_decode_to_input(color_mode, width, height, band_height):
+    pixels = random_pixels(width, height, color_mode)
+    data = write_bands(pixels, band_height, color_mode)
+
+    with Image.open(io.BytesIO(data)) as image:
+        assert image.mode == ("RGBA" if color_mode == "rgba" else "L")
+        decoded = np.asarray(image)
+    expected = pixels if color_mode == "rgba" else pixels[..., 3]
+    np.testing.assert_array_equal(decoded, expected)
+
+
+def test_rows_must_match_height():
+    pixels = random_pixels(4, 6, "rgba")
+    with pytest.raises(ValueError):
+        PngStreamWriter(io.BytesIO(), 4, 5).write(pixels)
+    png = PngStreamWriter(io.BytesIO(), 4, 6)
+    png.write(pixels[:3])
+    with pytest.raises(ValueError):
+        png.close()
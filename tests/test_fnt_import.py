@@ -0,0 +1,39 @@
+from PIL import Image
+
+from bmfont.service.descriptor import KerningInfo, parse_descriptor
+from bmfont.service.fnt_import import load_fnt
+from bmfont.service.font_generator import FontGenerator
+
+
+def make_glyphs(folder, values):
+    character_data = []
+    for index, value in enumerate(values):
+        path = folder / f"{index}.png"
+        Image.new("RGBA", (8 + index, 12), (255, 255, 255, 255)).save(path)
+        character_data.append({"image_path": str(path), "value": value})
+    return character_data
+
+
+def test_kernings_survive_round_trip(tmp_path):
+    kernings = [KerningInfo(ord("A"), ord("V"), -3), KerningInfo(ord("V"), ord("A"), -2)]
+    source = tmp_path / "source"
+    source.mkdir()
+    FontGenerator(
+        make_glyphs(source, "AVT"),
+        str(tmp_path / "first"),
+        "font",
+        use_cache=False,
+        # 字符不在字体中的字距调整不写入
+        kernings=[*kernings, KerningInfo(ord("A"), ord("W"), -1)],
+    ).generate_font()
+
+    imported = load_fnt(tmp_path / "first" / "font.fnt")
+    assert imported.descriptor.kernings == kernings
+
+    FontGenerator(
+        imported.character_data, str(tmp_path / "second"), "font", use_cache=False, **imported.options
+    ).generate_font()
+
+    descriptor = parse_descriptor((tmp_path / "second" / "font.fnt").read_bytes())
+    assert descriptor.kernings == kernings
+    assert [char.id for char in descriptor.chars] == [char.id for char in imported.descriptor.chars]